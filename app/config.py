@@ -12,4 +12,98 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "postgres"),
 }
 
-DATABASE_URL = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+# 'postgres' или 'sqlite' - встроенная БД в одном файле для небольших установок без отдельного сервера
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/hom.db")  # Файл базы SQLite
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", "4"))  # Соединений для чтения (пишет всегда одно соединение)
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))  # Кэш страниц на каждое соединение
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))  # Сколько файла базы читать через mmap, 0 - не использовать
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL в режиме WAL не теряет целостность при сбое, FULL - и последние коммиты
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # Сколько ждать занятую базу (другой процесс пишет), мс
+
+if DB_BACKEND == "sqlite":
+    DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
+elif os.getenv("DATABASE_URL"):
+    DATABASE_URL = os.getenv("DATABASE_URL")  # Полный адрес PostgreSQL вместо DB_* (например, для тестов)
+else:
+    DATABASE_URL = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+
+# Реплика только для чтения (статистика и меню). Не задана - все запросы идут в основную БД. С SQLite не используется
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# Сколько секунд после записи чтения пользователя идут в основную БД, чтобы он сразу видел свои изменения
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+
+# Настройки графиков
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))  # Процессы для отрисовки графиков
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))  # Сколько графиков держать в кэше
+
+# Настройки курсов валют
+RATES_PROVIDER = os.getenv("RATES_PROVIDER", "http")  # 'http' или 'file'
+RATES_URL = os.getenv("RATES_URL", "https://www.cbr-xml-daily.ru/daily_json.js")  # JSON в формате ЦБ РФ
+RATES_FILE = os.getenv("RATES_FILE", "rates.json")  # {"date": "2026-10-19", "rates": {"USD": 81.5}}
+RATES_REFRESH_INTERVAL = int(os.getenv("RATES_REFRESH_INTERVAL", "3600"))  # Секунды между обновлениями
+RATES_CACHE_TTL = int(os.getenv("RATES_CACHE_TTL", "600"))  # Секунды жизни кэша курсов
+
+# Настройки рассылки сводок
+TIMEZONE = os.getenv("TIMEZONE", "Europe/Moscow")  # Граница дня для всех дат бота (modules.clock.today), не только для сводок
+DIGEST_TIME = os.getenv("DIGEST_TIME", "09:00")  # Время рассылки сводок за прошедший день/неделю/месяц
+DIGEST_BATCH_SIZE = int(os.getenv("DIGEST_BATCH_SIZE", "1000"))  # Строк за одну выборку из БД
+SEND_RATE = float(os.getenv("SEND_RATE", "25"))  # Сообщений в секунду (лимит Telegram ~30)
+SEND_QUEUE_SIZE = int(os.getenv("SEND_QUEUE_SIZE", "5000"))  # Максимум сообщений в очереди отправки
+
+# Настройки регулярных операций
+RECURRING_INTERVAL = int(os.getenv("RECURRING_INTERVAL", "3600"))  # Секунды между проверками наступивших операций
+
+# Режим запуска: 'polling' - один процесс, 'ingress' - приём обновлений в очередь, 'worker' - обработка очереди
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Если задан, ingress принимает обновления через webhook
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))  # Номер воркера (0..WORKER_COUNT-1)
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))  # Сколько всего воркеров
+QUEUE_SHARDS = int(os.getenv("QUEUE_SHARDS", "1024"))  # Шарды очереди по chat_id, делятся между воркерами
+QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", "100"))  # Обновлений за одну выборку
+QUEUE_POLL_INTERVAL = float(os.getenv("QUEUE_POLL_INTERVAL", "0.2"))  # Пауза при пустой очереди, секунды
+QUEUE_LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", "60"))  # Через сколько необработанное обновление снова доступно
+
+# Настройки логирования
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # 'json' или 'text'
+# Доля записываемых частых событий: "transaction_added=0.1,statistics_viewed=0.2". Ошибки и предупреждения пишутся всегда
+LOG_SAMPLE_RATES = dict(
+    (name.strip(), float(rate))
+    for name, rate in (item.split("=") for item in os.getenv("LOG_SAMPLE_RATES", "").split(",") if "=" in item)
+)
+
+# Администрирование
+ADMIN_IDS = {int(item) for item in os.getenv("ADMIN_IDS", "").split(",") if item.strip()}  # chat_id администраторов
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # Куда сохранять профили (.prof, смотреть через pstats/snakeviz)
+PROFILE_DEFAULT_UPDATES = int(os.getenv("PROFILE_DEFAULT_UPDATES", "100"))  # Сколько обновлений профилировать по умолчанию
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "300"))  # Профилирование выключается не позже чем через это время
+ADMIN_STATS_REFRESH_INTERVAL = int(os.getenv("ADMIN_STATS_REFRESH_INTERVAL", "900"))  # Секунды между пересчётами статистики /admin
+
+# Фоновое удаление данных пользователя
+WIPE_BATCH_SIZE = int(os.getenv("WIPE_BATCH_SIZE", "2000"))  # Операций за одну короткую транзакцию
+WIPE_BATCH_PAUSE = float(os.getenv("WIPE_BATCH_PAUSE", "0.05"))  # Пауза между пачками, секунды
+WIPE_PROGRESS_INTERVAL = float(os.getenv("WIPE_PROGRESS_INTERVAL", "2"))  # Как часто обновлять сообщение с прогрессом
+WIPE_RETRIES = int(os.getenv("WIPE_RETRIES", "5"))  # Повторов пачки после временной ошибки БД
+WIPE_RETRY_DELAY = float(os.getenv("WIPE_RETRY_DELAY", "1"))  # Пауза перед первым повтором, секунды (дальше удваивается)
+WIPE_RESUME_INTERVAL = int(os.getenv("WIPE_RESUME_INTERVAL", "300"))  # Как часто подхватывать остановившиеся удаления
+
+# Проверки состояния (HTTP /healthz и /readyz)
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", "8080"))  # 0 - не запускать
+HEALTH_LAG_THRESHOLD = float(os.getenv("HEALTH_LAG_THRESHOLD", "0.5"))  # Задержка цикла событий, после которой пишем в лог, секунды
+HEALTH_MAX_UPDATE_SECONDS = float(os.getenv("HEALTH_MAX_UPDATE_SECONDS", "120"))  # Обновление дольше - процесс считается зависшим
+
+# Ограничение частоты входящих сообщений (token bucket на chat_id)
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "1"))  # Сообщений в секунду в среднем, 0 - без ограничения
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))  # Сколько сообщений подряд можно отправить сразу
+RATE_LIMIT_MAX_CHATS = int(os.getenv("RATE_LIMIT_MAX_CHATS", "100000"))  # Максимум чатов в памяти ограничителя
+RATE_LIMIT_PER_MEMBER = os.getenv("RATE_LIMIT_PER_MEMBER", "false").lower() == "true"  # В группах - лимит на каждого участника
+
+# Настройки истории баланса
+BALANCE_SNAPSHOT_INTERVAL = int(os.getenv("BALANCE_SNAPSHOT_INTERVAL", "3600"))  # Секунды между проверками снимков на конец дня
+
+# Аналитика расходов (/analytics)
+ANALYTICS_DAYS = int(os.getenv("ANALYTICS_DAYS", "365"))  # За сколько последних дней считать аналитику
+ANALYTICS_WINDOW = int(os.getenv("ANALYTICS_WINDOW", "30"))  # Окно скользящего среднего, дни
+ANALYTICS_Z_THRESHOLD = float(os.getenv("ANALYTICS_Z_THRESHOLD", "3"))  # День с z-оценкой выше - необычный
@@ -1,36 +1,162 @@
+import asyncio
 import logging
 import os
 import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
+from modules.logging_setup import setup_logging
+
+setup_logging()  # До импорта модулей, которые пишут в лог при подключении к БД
+
+from config import (
+    ADMIN_STATS_REFRESH_INTERVAL,
+    BALANCE_SNAPSHOT_INTERVAL,
+    BOT_MODE,
+    DIGEST_TIME,
+    RATES_REFRESH_INTERVAL,
+    RECURRING_INTERVAL,
+    TIMEZONE,
+    WEBHOOK_PORT,
+    WEBHOOK_URL,
+    WIPE_RESUME_INTERVAL,
+    WORKER_COUNT,
+    WORKER_INDEX,
+)
+from modules.admin import admin_command, refresh_admin_stats
+from modules.analytics import analytics_command
+from modules.balance_history import save_balance_snapshots
+from modules.charts import shutdown_charts
+from modules.digests import send_digests
+from modules.exchange_rates import refresh_exchange_rates
 from modules.handlers import (
     RESETTING_BALANCE,
     SETTING_BALANCE,
+    balance_command,
+    budget_command,
     cancel_operation,
+    find_callback,
+    find_command,
+    chart_command,
+    digest_command,
     handle_message,
+    history_callback,
+    history_command,
     process_balance_input,
     process_reset_balance,
+    recurring_command,
     show_settings_menu,
     show_statistics,
     show_statistics_menu,
     start,
     start_reset_balance,
     start_set_balance,
+    stats_command,
     create_currency_balance,
 )
+from modules.health import start_health, stop_health, track_update_end, track_update_start
+from modules.profiling import profile_command
+from modules.rate_limit import rate_limit_messages
+from modules.recurring import create_recurring_transactions
+from modules.sender import start_sender, stop_sender
+from modules.update_queue import enqueue_incoming_update, run_worker
+from modules.wipe import resume_wipe_jobs
+from telegram import Update # type: ignore
 from telegram.ext import (
     Application,
+    CallbackQueryHandler,
     CommandHandler,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
 
+async def post_init(application):
+    await start_sender(application)
+    await start_health(application)
+
+
+async def post_shutdown(application):
+    await stop_health(application)
+    await stop_sender(application)
+    await shutdown_charts(application)
+
+
+def register_handlers(application):
+    # Первая и последняя группы отмечают начало и конец обработки обновления для /healthz
+    application.add_handler(TypeHandler(Update, track_update_start), group=-100)
+    application.add_handler(TypeHandler(Update, track_update_end), group=100)
+    # Ограничение частоты сообщений от одного чата - до всех обработчиков
+    application.add_handler(TypeHandler(Update, rate_limit_messages), group=-1)
+
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("chart", chart_command))
+    application.add_handler(CommandHandler("balance", balance_command))
+    application.add_handler(CommandHandler("analytics", analytics_command))
+    application.add_handler(CommandHandler("budget", budget_command))
+    application.add_handler(CommandHandler("digest", digest_command))
+    application.add_handler(CommandHandler("recurring", recurring_command))
+    application.add_handler(CommandHandler("history", history_command))
+    application.add_handler(CallbackQueryHandler(history_callback, pattern=r"^hist:"))
+    application.add_handler(CommandHandler("find", find_command))
+    application.add_handler(CallbackQueryHandler(find_callback, pattern=r"^find:"))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("admin", admin_command))
+
+    # Обработчик для обычных сообщений
+    application.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
+    )
+
+
+def register_jobs(application):
+    # Периодическое обновление курсов валют
+    application.job_queue.run_repeating(
+        refresh_exchange_rates, interval=RATES_REFRESH_INTERVAL, first=0
+    )
+
+    # Ежедневная рассылка сводок (недельные - по понедельникам, месячные - 1-го числа)
+    digest_time = datetime.strptime(DIGEST_TIME, "%H:%M").time().replace(tzinfo=ZoneInfo(TIMEZONE))
+    application.job_queue.run_daily(send_digests, time=digest_time)
+
+    # Регулярные операции: первый запуск сразу досоздаёт пропущенные за время простоя
+    application.job_queue.run_repeating(
+        create_recurring_transactions, interval=RECURRING_INTERVAL, first=0
+    )
+
+    # Снимки балансов на конец дня: первый запуск сразу дописывает пропущенный за время простоя день
+    application.job_queue.run_repeating(
+        save_balance_snapshots, interval=BALANCE_SNAPSHOT_INTERVAL, first=0
+    )
+
+    # Удаления данных, прерванные перезапуском или ошибкой БД, продолжаются с места остановки
+    application.job_queue.run_repeating(
+        resume_wipe_jobs, interval=WIPE_RESUME_INTERVAL, first=0
+    )
+
+    # Статистика /admin: представления пересчитываются по расписанию, а не при каждом запросе
+    application.job_queue.run_repeating(
+        refresh_admin_stats, interval=ADMIN_STATS_REFRESH_INTERVAL, first=60
+    )
+
+
+# Приём обновлений: только запись в очередь, обработкой занимаются воркеры
+def run_ingress(token):
+    application = Application.builder().token(token).build()
+    application.add_handler(TypeHandler(Update, enqueue_incoming_update))
+
+    logger.info("✅ Ingress is running and queueing updates...")
+    if WEBHOOK_URL:
+        application.run_webhook(listen="0.0.0.0", port=WEBHOOK_PORT, webhook_url=WEBHOOK_URL)
+    else:
+        application.run_polling()
+
+
 def main():
     # Используем BOT_TOKEN вместо TELEGRAM_BOT_TOKEN
     token = os.getenv("BOT_TOKEN")
@@ -45,23 +171,33 @@ def main():
     time.sleep(10)
 
     try:
+        if BOT_MODE == "ingress":
+            run_ingress(token)
+            return
+
         # Создаем Application вместо Updater
-        application = Application.builder().token(token).build()
+        builder = Application.builder().token(token).post_init(post_init).post_shutdown(post_shutdown)
+        if BOT_MODE == "worker":
+            builder = builder.updater(None)  # Воркер не опрашивает Telegram, обновления приходят из очереди
+        application = builder.build()
 
         # Добавляем обработчики
-        application.add_handler(CommandHandler("start", start))
+        register_handlers(application)
 
-        # Обработчик для обычных сообщений
-        application.add_handler(
-            MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
-        )
+        # Фоновые задачи выполняет один процесс: в режиме воркеров - нулевой
+        if BOT_MODE != "worker" or WORKER_INDEX == 0:
+            register_jobs(application)
+
+        if BOT_MODE == "worker":
+            asyncio.run(run_worker(application, WORKER_INDEX, WORKER_COUNT, post_init, post_shutdown))
+            return
 
         logger.info("✅ Bot starting...")
         logger.info("✅ Bot is running and waiting for messages...")
         application.run_polling()
 
     except Exception as e:
-        logger.error(f"❌ Bot error: {e}")
+        logger.error("❌ Bot error: %s", e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from config import ADMIN_IDS, TIMEZONE
+from modules.database import get_admin_stats, refresh_admin_views
+from telegram import Update # type: ignore
+from telegram.ext import ContextTypes # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+''' Обновление статистики '''
+
+async def refresh_admin_stats(context):
+    """Задача JobQueue: пересчитать материализованные представления статистики /admin"""
+    try:
+        await asyncio.to_thread(refresh_admin_views)
+    except Exception as e:
+        logger.error("❌ Error refreshing admin stats: %s", e)
+
+
+''' Команда /admin '''
+
+def format_size(size):
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+def format_growth(size_history):
+    """Изменение размера базы за сутки, неделю и месяц по ежедневным замерам (size_history - от новых к старым)"""
+    if len(size_history) < 2:
+        return "📈 Рост базы: замеров пока недостаточно"
+
+    latest_day, latest_size = size_history[0]
+    changes = {}  # Дней между замерами -> изменение размера
+    for days in (1, 7, 30):
+        # Самый старый замер в пределах периода: если дни пропущены, период получается короче
+        day, size = [sample for sample in size_history if sample[0] >= latest_day - timedelta(days=days)][-1]
+        if day < latest_day:
+            changes[(latest_day - day).days] = latest_size - size
+
+    parts = [f"{'+' if change >= 0 else '-'}{format_size(abs(change))} за {span} дн." for span, change in changes.items()]
+    return "📈 Рост базы: " + ", ".join(parts)
+
+
+def format_admin_stats(stats):
+    message = (
+        f"🛠 Статистика бота\n"
+        f"🔄 Обновлена: {stats.refreshed_at.astimezone(ZoneInfo(TIMEZONE)):%Y-%m-%d %H:%M} (пересчёт {stats.refresh_ms} мс)\n\n"
+    )
+
+    message += "👥 Активность по дням (пользователи / операции):\n"
+    if stats.daily:
+        for day, active_users, operations in stats.daily:
+            message += f"• {day}: {active_users} / {operations}\n"
+    else:
+        message += "• нет данных\n"
+
+    message += "\n⏰ Операции по часам (последние сутки):\n"
+    if stats.hourly:
+        message += ", ".join(f"{hour:%H}ч - {operations}" for hour, _, operations in reversed(stats.hourly)) + "\n"
+    else:
+        message += "• нет данных\n"
+
+    message += "\n🏷 Топ категорий за 30 дней:\n"
+    for category, operation_type, users, operations, total in stats.top_categories:
+        sign = "+" if operation_type == "income" else "-"
+        message += f"• {category}: {operations} опер., {users} польз., {sign}{total:.2f} ₽\n"
+
+    message += (
+        f"\n💾 База: {format_size(stats.database_size)}, "
+        f"операции: {format_size(stats.transactions_size)} (≈ {stats.transactions_rows} строк)\n"
+        f"{format_growth(stats.size_history)}"
+    )
+    return message
+
+
+async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /admin: статистика по всем пользователям (только для администраторов)"""
+    chat_id = update.effective_chat.id
+    if chat_id not in ADMIN_IDS:
+        return
+
+    try:
+        stats = await asyncio.to_thread(get_admin_stats)
+        if stats is None:
+            await update.message.reply_text("ℹ️ Статистика ещё не собрана, попробуйте через несколько минут")
+            return
+        await update.message.reply_text(format_admin_stats(stats))
+    except Exception as e:
+        logger.error("Error in admin command for %s: %s", chat_id, e)
+        await update.message.reply_text("❌ Ошибка при получении статистики")
@@ -0,0 +1,186 @@
+import asyncio
+import calendar
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from config import ANALYTICS_DAYS, ANALYTICS_WINDOW, ANALYTICS_Z_THRESHOLD
+from modules import clock
+from modules.charts import render_chart, render_line_chart
+from modules.database import get_expense_columns
+from modules.keyboards import get_statistics_keyboard
+from modules.message_parser import shift_months
+from modules.money import Money
+from telegram import Update # type: ignore
+from telegram.ext import ContextTypes # type: ignore
+
+logger = logging.getLogger(__name__)
+
+TOP_CATEGORIES = 8  # Сколько категорий показывать в сравнении с прошлым месяцем
+TOP_OUTLIERS = 5  # Сколько необычных дней показывать
+CHART_DAYS = 90  # За сколько дней рисовать скользящее среднее
+
+
+@dataclass
+class Analytics:
+    """Метрики расходов. Суммы - в копейках (float после усреднения)"""
+    start_date: date
+    daily: np.ndarray  # Расходы по дням от start_date до сегодня
+    moving_average: np.ndarray  # Среднее за ANALYTICS_WINDOW дней, заканчивающихся в каждый день (с дня window-1)
+    outliers: list  # (дата, расход, z-оценка) по убыванию z
+    categories: list  # (категория, за месяц, за тот же срок прошлого месяца)
+    month_spent: int
+    forecast: float
+    days_elapsed: int
+    days_in_month: int
+
+
+def compute_analytics(
+    days, codes, amounts, names, today, window=ANALYTICS_WINDOW, z_threshold=ANALYTICS_Z_THRESHOLD
+):
+    """Все метрики по колонкам (день от 1970-01-01, код категории, сумма) векторными операциями NumPy.
+
+    names - названия категорий по кодам. None, если расходов нет
+    """
+    if not len(days):
+        return None
+
+    dates = np.asarray(days, dtype=np.int64).astype("datetime64[D]")
+    codes = np.asarray(codes, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.int64)
+    start = dates.min()
+    start_date = start.astype(object)
+    day_index = (dates - start).astype(np.int64)
+    days = (today - start_date).days + 1
+
+    # Ряд по дням: дни без расходов - нули
+    daily = np.bincount(day_index, weights=amounts, minlength=days)
+
+    # Скользящее среднее через накопленную сумму: O(n) без цикла по окнам
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    moving_average = (cumulative[window:] - cumulative[:-window]) / window
+
+    # Необычные дни: z-оценка дневного расхода относительно всей истории
+    outliers = []
+    std = daily.std()
+    if std > 0:
+        z = (daily - daily.mean()) / std
+        found = np.flatnonzero(z >= z_threshold)
+        found = found[np.argsort(z[found])[::-1][:TOP_OUTLIERS]]
+        outliers = [(start_date + timedelta(days=int(i)), int(daily[i]), float(z[i])) for i in found]
+
+    # Категории: текущий месяц против того же числа дней прошлого месяца
+    month_start = today.replace(day=1)
+    prev_start = shift_months(month_start, -1)
+    prev_end = shift_months(today, -1)
+    current = dates >= np.datetime64(month_start)
+    previous = (dates >= np.datetime64(prev_start)) & (dates <= np.datetime64(prev_end))
+    current_totals = np.bincount(codes[current], weights=amounts[current], minlength=len(names))
+    previous_totals = np.bincount(codes[previous], weights=amounts[previous], minlength=len(names))
+    order = np.lexsort((previous_totals, current_totals))[::-1][:TOP_CATEGORIES]
+    order = order[(current_totals[order] > 0) | (previous_totals[order] > 0)]
+    top_categories = [(str(names[i]), int(current_totals[i]), int(previous_totals[i])) for i in order]
+
+    # Прогноз на конец месяца по среднему расходу в день с начала месяца
+    days_elapsed = today.day
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    month_spent = int(daily[max(0, (month_start - start_date).days):].sum())
+    forecast = month_spent / days_elapsed * days_in_month
+
+    return Analytics(
+        start_date=start_date,
+        daily=daily,
+        moving_average=moving_average,
+        outliers=outliers,
+        categories=top_categories,
+        month_spent=month_spent,
+        forecast=forecast,
+        days_elapsed=days_elapsed,
+        days_in_month=days_in_month,
+    )
+
+
+def format_change_percent(current, previous):
+    if not previous:
+        return "новое" if current else "—"
+    return f"{(current - previous) * 100 / previous:+.0f}%"
+
+
+def money(minor):
+    """Копейки (в том числе средние, дробные) -> Money"""
+    return Money(round(minor))
+
+
+def format_analytics(analytics, window=ANALYTICS_WINDOW):
+    message = "🧮 Аналитика расходов\n\n"
+
+    if len(analytics.moving_average):
+        current = analytics.moving_average[-1]
+        message += f"📊 В среднем за {window} дн.: {money(current):.2f} ₽ в день"
+        if len(analytics.moving_average) > window:
+            previous = analytics.moving_average[-1 - window]
+            message += f" ({format_change_percent(current, previous)} к предыдущим {window} дн.)"
+        message += "\n\n"
+    else:
+        message += f"📊 Для среднего за {window} дн. пока мало истории\n\n"
+
+    message += (
+        f"🔮 Прогноз на месяц: {money(analytics.forecast):.2f} ₽ "
+        f"(потрачено {money(analytics.month_spent):.2f} ₽ за {analytics.days_elapsed} из {analytics.days_in_month} дн.)\n\n"
+    )
+
+    if analytics.categories:
+        message += "🏷 Категории к тому же сроку прошлого месяца:\n"
+        for category, current, previous in analytics.categories:
+            message += (
+                f"      • {category}: {money(current):.2f} ₽ ({format_change_percent(current, previous)})\n"
+            )
+        message += "\n"
+
+    if analytics.outliers:
+        message += "⚡ Необычные дни:\n"
+        for day, amount, z in analytics.outliers:
+            message += f"      • {day}: {money(amount):.2f} ₽ (z = {z:.1f})\n"
+    else:
+        message += "⚡ Необычных дней нет\n"
+    return message
+
+
+def build_moving_average_chart(analytics):
+    """Подписи и значения (рубли) скользящего среднего за последние CHART_DAYS дней"""
+    values = analytics.moving_average[-CHART_DAYS:] / 100
+    last_day = analytics.start_date + timedelta(days=len(analytics.daily) - 1)
+    labels = [(last_day - timedelta(days=offset)).strftime("%d.%m") for offset in range(len(values) - 1, -1, -1)]
+    return labels, values.tolist()
+
+
+def load_analytics(chat_id, today):
+    days, codes, amounts, names = get_expense_columns(chat_id, today - timedelta(days=ANALYTICS_DAYS - 1), today)
+    return compute_analytics(days, codes, amounts, names, today)
+
+
+async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /analytics: скользящее среднее, динамика категорий, необычные дни и прогноз на месяц"""
+    chat_id = update.effective_chat.id
+    try:
+        analytics = await asyncio.to_thread(load_analytics, chat_id, clock.today())
+        if analytics is None:
+            await update.message.reply_text(
+                f"🧮 За последние {ANALYTICS_DAYS} дн. расходов не было", reply_markup=get_statistics_keyboard()
+            )
+            return
+
+        await update.message.reply_text(format_analytics(analytics), reply_markup=get_statistics_keyboard())
+        if len(analytics.moving_average) > 1:
+            labels, values = build_moving_average_chart(analytics)
+            photo = await render_chart(
+                render_line_chart, f"Расходы в день, среднее за {ANALYTICS_WINDOW} дн.", labels, values
+            )
+            await update.message.reply_photo(photo=photo, reply_markup=get_statistics_keyboard())
+        logger.info("✅ User %s viewed analytics", chat_id, extra={"event": "analytics_viewed"})
+
+    except Exception as e:
+        logger.error("Error in analytics for user %s: %s", chat_id, e)
+        await update.message.reply_text("❌ Ошибка при расчёте аналитики", reply_markup=get_statistics_keyboard())
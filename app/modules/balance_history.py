@@ -0,0 +1,19 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from modules import clock
+from modules.database import snapshot_balances
+
+logger = logging.getLogger(__name__)
+
+
+async def save_balance_snapshots(context):
+    """Задача JobQueue: снимки балансов на конец вчерашнего дня. Повторные запуски за тот же день ничего не добавляют"""
+    day = clock.today() - timedelta(days=1)
+    try:
+        created = await asyncio.to_thread(snapshot_balances, day)
+        if created:
+            logger.info("✅ Saved %s balance snapshots for %s", created, day)
+    except Exception as e:
+        logger.error("❌ Error saving balance snapshots: %s", e)
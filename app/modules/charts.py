@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import io
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+
+from config import CHART_CACHE_SIZE, CHART_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Больше стольких дней на графике - группируем столбцы по месяцам
+MAX_DAILY_BARS = 92
+# Больше стольких категорий на диаграмме - остальные сворачиваем в "другое"
+MAX_PIE_CATEGORIES = 8
+
+_executor = None
+_chart_cache = OrderedDict()  # (chat_id, период, вид графика, версия данных) -> file_id или PNG
+
+
+''' Отрисовка (выполняется в процессах пула) '''
+
+def _figure_to_png(figure):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=120, bbox_inches="tight")
+    plt.close(figure)
+    return buffer.getvalue()
+
+
+def render_pie_chart(title, categories):
+    """Круговая диаграмма расходов по категориям"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    labels = [category for category, _ in categories]
+    values = [float(amount) for _, amount in categories]
+
+    figure, axes = plt.subplots(figsize=(6, 6))
+    axes.pie(values, labels=labels, autopct="%1.0f%%", startangle=90, counterclock=False)
+    axes.set_title(title)
+    axes.axis("equal")
+    return _figure_to_png(figure)
+
+
+def render_bar_chart(title, labels, values):
+    """Столбчатая диаграмма расходов по дням (или месяцам)"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(figsize=(max(6, len(labels) * 0.25), 4))
+    axes.bar(range(len(labels)), [float(value) for value in values], color="#d4a017")
+    step = max(1, len(labels) // 15)
+    axes.set_xticks(range(0, len(labels), step))
+    axes.set_xticklabels(labels[::step], rotation=45, ha="right")
+    axes.set_ylabel("₽")
+    axes.set_title(title)
+    axes.grid(axis="y", alpha=0.3)
+    return _figure_to_png(figure)
+
+
+def render_line_chart(title, labels, values):
+    """Линейный график баланса по дням"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(figsize=(max(6, len(labels) * 0.15), 4))
+    axes.plot(range(len(labels)), [float(value) for value in values], color="#d4a017", linewidth=2)
+    step = max(1, len(labels) // 15)
+    axes.set_xticks(range(0, len(labels), step))
+    axes.set_xticklabels(labels[::step], rotation=45, ha="right")
+    axes.axhline(0, color="grey", linewidth=0.8)
+    axes.set_ylabel("₽")
+    axes.set_title(title)
+    axes.grid(alpha=0.3)
+    return _figure_to_png(figure)
+
+
+''' Пул процессов '''
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _executor = ProcessPoolExecutor(max_workers=CHART_WORKERS)
+    return _executor
+
+
+async def render_chart(render_func, *args):
+    """Рисует график в пуле процессов, не блокируя цикл событий бота"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), render_func, *args)
+
+
+async def shutdown_charts(application):
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("✅ Chart pool stopped")
+
+
+''' Подготовка данных и кэш '''
+
+def build_chart_series(rows, start_date, end_date):
+    """Из строк (date, category, amount) собирает суммы по категориям и ряд по дням/месяцам"""
+    categories = {}
+    by_day = {}
+    for row in rows:
+        categories[row.category] = categories.get(row.category, 0) + row.amount
+        by_day[row.date] = by_day.get(row.date, 0) + row.amount
+
+    labels, values = [], []
+    if (end_date - start_date).days < MAX_DAILY_BARS:
+        day = start_date
+        while day <= end_date:
+            labels.append(day.strftime("%d.%m"))
+            values.append(by_day.get(day, 0))
+            day += timedelta(days=1)
+    else:
+        by_month = {}
+        for day, amount in by_day.items():
+            key = (day.year, day.month)
+            by_month[key] = by_month.get(key, 0) + amount
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            labels.append(f"{month:02d}.{year}")
+            values.append(by_month.get((year, month), 0))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    top_categories = sorted(categories.items(), key=lambda item: item[1], reverse=True)
+    if len(top_categories) > MAX_PIE_CATEGORIES:
+        rest = sum(amount for _, amount in top_categories[MAX_PIE_CATEGORIES - 1:])
+        top_categories = top_categories[:MAX_PIE_CATEGORIES - 1] + [("другое", rest)]
+    return top_categories, labels, values
+
+
+def get_data_version(*data):
+    """Версия данных графика: меняется при любом изменении сумм за период"""
+    return hashlib.sha1(repr(data).encode()).hexdigest()[:16]
+
+
+def get_cached_chart(key):
+    if key in _chart_cache:
+        _chart_cache.move_to_end(key)
+        return _chart_cache[key]
+    return None
+
+
+def cache_chart(key, value):
+    _chart_cache[key] = value
+    _chart_cache.move_to_end(key)
+    while len(_chart_cache) > CHART_CACHE_SIZE:
+        _chart_cache.popitem(last=False)
@@ -0,0 +1,12 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from config import TIMEZONE
+
+_zone = ZoneInfo(TIMEZONE)
+
+
+def today():
+    """Сегодняшняя дата в TIMEZONE. Граница дня одна для операций, сводок, снимков и регулярных операций,
+    в какой бы зоне ни работал сервер"""
+    return datetime.now(_zone).date()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from config import DIGEST_BATCH_SIZE
+from modules import clock
+from modules.database import iter_digest_batches
+from modules.message_parser import shift_months
+from modules.sender import sender
+
+logger = logging.getLogger(__name__)
+
+DIGEST_NAMES = {"day": "день", "week": "неделю", "month": "месяц"}
+
+
+def get_due_digests(today):
+    """Периоды, сводки за которые пора отправить: вчера, прошлая неделя (по понедельникам), прошлый месяц (1-го числа)"""
+    yesterday = today - timedelta(days=1)
+    due = [("day", yesterday, yesterday)]
+    if today.weekday() == 0:
+        due.append(("week", today - timedelta(days=7), yesterday))
+    if today.day == 1:
+        due.append(("month", shift_months(today, -1), yesterday))
+    return due
+
+
+def format_digest(period, start_date, end_date, row):
+    if start_date == end_date:
+        period_name = f"{start_date}"
+    else:
+        period_name = f"{start_date} - {end_date}"
+
+    message = "───────── • ✦ • ─────────\n"
+    message += f"      Сводка за {DIGEST_NAMES[period]}\n"
+    message += f"       {period_name}\n"
+    message += "───────── • ✦ • ─────────\n\n"
+
+    if row.operations:
+        net_income = row.income - row.expenses
+        message += f"📈 Доходы: {row.income:.2f} ₽\n"
+        message += f"📉 Расходы: {row.expenses:.2f} ₽\n"
+        message += f"{'🔺️ Прибыль' if net_income >= 0 else '🔻 Убыток'}: {net_income:.2f} ₽\n"
+        message += f"Операций: {row.operations}\n\n"
+    else:
+        message += "Операций за период не было\n\n"
+
+    message += f"💵 Баланс: {row.balance or 0:.2f} ₽"
+    return message
+
+
+async def send_digests(context):
+    """Задача JobQueue: сводки всем подписчикам - один запрос на период, отправка через очередь с лимитом скорости"""
+    # Та же зона, в которой JobQueue запускает задачу: иначе на сервере в UTC «вчера» сдвигается на сутки
+    today = clock.today()
+
+    for period, start_date, end_date in get_due_digests(today):
+        sent = 0
+        try:
+            batches = iter_digest_batches(period, start_date, end_date, DIGEST_BATCH_SIZE)
+            while True:
+                # Порции читаются в отдельном потоке, чтобы не блокировать цикл событий
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                for row in batch:
+                    await sender.send(row.chat_id, format_digest(period, start_date, end_date, row))
+                    sent += 1
+            logger.info("✅ %s digest queued for %s users", period, sent)
+        except Exception as e:
+            logger.error("❌ Error sending %s digests: %s", period, e)
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from config import RATES_CACHE_TTL, RATES_FILE, RATES_PROVIDER, RATES_URL
+from modules import clock
+from modules.database import get_exchange_rates, save_exchange_rates
+from modules.money import Money
+
+logger = logging.getLogger(__name__)
+
+
+''' Источники курсов '''
+
+class RateProvider(ABC):
+    """Источник курсов: fetch() возвращает (дата, {валюта: рублей за единицу})"""
+
+    @abstractmethod
+    def fetch(self):
+        ...
+
+
+class FileRateProvider(RateProvider):
+    """Курсы из локального JSON-файла: {"date": "2026-10-19", "rates": {"USD": 81.5, "CNY": 11.4}}"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, encoding="utf-8") as file:
+            data = json.load(file)
+        rates_date = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        rates = {currency: Decimal(str(rate)) for currency, rate in data["rates"].items()}
+        return rates_date, rates
+
+
+class HttpRateProvider(RateProvider):
+    """Курсы по HTTP в формате ЦБ РФ (cbr-xml-daily.ru/daily_json.js)"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            data = json.loads(response.read().decode("utf-8"))
+        rates_date = datetime.fromisoformat(data["Date"]).date()
+        rates = {
+            currency: Decimal(str(item["Value"])) / Decimal(item["Nominal"])
+            for currency, item in data["Valute"].items()
+        }
+        return rates_date, rates
+
+
+def get_rate_provider():
+    if RATES_PROVIDER == "file":
+        return FileRateProvider(RATES_FILE)
+    return HttpRateProvider(RATES_URL)
+
+
+''' Кэш курсов '''
+
+class RateCache:
+    """Курсы на дату с временем жизни, чтобы не ходить в БД на каждый показ меню"""
+
+    def __init__(self, ttl, max_size=64):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()  # дата -> (время истечения, курсы)
+
+    def get(self, on_date):
+        item = self._items.get(on_date)
+        if item and item[0] > time.monotonic():
+            return item[1]
+
+        rates = get_exchange_rates(on_date)
+        self._put(on_date, rates)
+        return rates
+
+    def _put(self, on_date, rates):
+        self._items[on_date] = (time.monotonic() + self.ttl, rates)
+        self._items.move_to_end(on_date)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def refresh(self, since, on_date):
+        """После сохранения курсов на дату since: курсы на более ранние даты не изменились, остальные
+        удаляются, а курсы на on_date сразу читаются из основной БД - реплика могла ещё не получить новые"""
+        for cached_date in [cached_date for cached_date in self._items if cached_date >= since]:
+            del self._items[cached_date]
+        self._put(on_date, get_exchange_rates(on_date, primary=True))
+
+
+rate_cache = RateCache(RATES_CACHE_TTL)
+
+
+def get_rates(on_date=None):
+    """Курсы валют на дату (по умолчанию на сегодня)"""
+    return rate_cache.get(on_date or clock.today())
+
+
+''' Конвертация '''
+
+def convert_to_rub(amount, currency, rates):
+    """Переводит сумму (Money) в рубли по курсу. None, если курс неизвестен"""
+    rate = rates.get(currency)
+    if rate is None:
+        return None
+    return amount * rate
+
+
+def get_total_in_rub(rub_balance, currencies, rates):
+    """Итог по всем счетам пользователя в рублях за один проход.
+
+    Возвращает (итог, список валют без курса)
+    """
+    total = rub_balance or Money(0)
+    missing = []
+    for currency in currencies:
+        rate = rates.get(currency.currency)
+        if rate is None:
+            missing.append(currency.currency)
+        else:
+            total += currency.amount * rate
+    return total, missing
+
+
+''' Обновление курсов '''
+
+async def refresh_exchange_rates(context):
+    """Задача JobQueue: загрузить курсы из источника и сохранить в БД"""
+    try:
+        rates_date, rates = await asyncio.to_thread(get_rate_provider().fetch)
+        await asyncio.to_thread(save_exchange_rates, rates_date, rates)
+        await asyncio.to_thread(rate_cache.refresh, rates_date, clock.today())
+    except Exception as e:
+        logger.error("❌ Error refreshing exchange rates: %s", e)
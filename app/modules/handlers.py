@@ -1,19 +1,49 @@
+import asyncio
 import logging
 import re
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 
 from modules.database import (
+    add_recurring_transaction,
     add_transaction,
     create_currency_balance,
-    delete_all_user_data,
+    delete_budget,
+    delete_recurring_transaction,
+    delete_transaction,
     delete_user_currency,
-    get_transactions,
-    get_transactions_by_period,
-    get_user_balance,
-    get_user_currencies,
+    get_balance_on,
+    get_balance_series,
+    get_budgets,
+    get_chart_data,
+    get_member_statistics,
+    get_digest_subscriptions,
+    get_period_comparison,
+    get_recurring_transactions,
+    get_transaction,
+    get_transactions_page,
+    search_transactions,
+    get_user_snapshot,
     reset_user_balance,
+    save_chat_member,
+    set_budget,
+    set_digest_subscription,
+    set_wipe_message,
+    start_user_data_wipe,
+    update_transaction_amount,
     update_user_currency,
 )
+from modules import clock
+from modules.charts import (
+    build_chart_series,
+    cache_chart,
+    get_cached_chart,
+    get_data_version,
+    render_bar_chart,
+    render_chart,
+    render_line_chart,
+    render_pie_chart,
+)
+from modules.exchange_rates import convert_to_rub, get_rates, get_total_in_rub
 from modules.keyboards import (
     get_main_keyboard,
     get_statistics_keyboard,
@@ -23,8 +53,15 @@ from modules.keyboards import (
     get_delete_currency_keyboard,
     get_cancel_keyboard,
     get_confirmation_keyboard,
+    get_history_cancel_keyboard,
+    get_history_delete_keyboard,
+    get_history_keyboard,
+    get_history_row_keyboard,
+    get_search_keyboard,
 )
-from modules.message_parser import parse_message
+from modules.message_parser import parse_budget, parse_message, parse_period, parse_recurring, parse_search
+from modules.money import Money
+from modules.wipe import format_wipe_progress, run_wipe_job
 from telegram import Update # type: ignore
 from telegram.ext import ContextTypes # type: ignore
 
@@ -34,10 +71,36 @@ SETTING_BALANCE, RESETTING_BALANCE, DELETING_ALL_DATA, SETTING_CURRENCY = range(
 
 CURRENCY_SYMBOLS = {"USD": "$", "CNY": "¥"}
 
+# Операций на одной странице /history
+HISTORY_PAGE_SIZE = 10
+
+# Пороги предупреждений по бюджету (доля от лимита)
+BUDGET_WARNING_THRESHOLDS = (80, 100)  # Проценты от лимита
+
+# Периоды сводок для /digest
+DIGEST_PERIODS = {
+    "day": "day", "день": "day", "ежедневно": "day",
+    "week": "week", "неделя": "week", "еженедельно": "week",
+    "month": "month", "месяц": "month", "ежемесячно": "month",
+}
+
+# Названия стандартных периодов для /stats
+PERIOD_TYPES = {
+    "day": "day", "день": "day", "сегодня": "day",
+    "week": "week", "неделя": "week",
+    "month": "month", "месяц": "month",
+}
+
+def flow_state(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Состояние диалога пользователя в текущем чате.
+
+    user_data у пользователя один на все чаты: без ключа по чату ввод суммы, начатый в личке,
+    перехватил бы сообщение в группе. chat_data тоже не подходит - в группе он общий для всех участников"""
+    return context.user_data.setdefault(update.effective_chat.id, {})
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         chat_id = update.effective_chat.id
-        current_balance = get_user_balance(chat_id)
 
         await update.message.reply_text(
             f"───────── • ✦ • ─────────\n",
@@ -51,9 +114,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"Техподдержка проекта: [Анжелика](https://t.me/@a_kalinina5)",
             reply_markup=get_main_keyboard(),
         )
-        logger.info(f"✅ User {chat_id} started the bot")
+        logger.info("✅ User %s started the bot", chat_id, extra={"event": "user_started"})
     except Exception as e:
-        logger.error(f"Error in start command: {e}")
+        logger.error("Error in start command: %s", e)
 
 # Обработка сообщения
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -66,6 +129,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "📅 День": lambda u, c: show_statistics(u, c, "day"),
         "📆 Неделя": lambda u, c: show_statistics(u, c, "week"),
         "📈 Месяц": lambda u, c: show_statistics(u, c, "month"),
+        "🥧 Графики": lambda u, c: show_charts(u, c, "month"),
         #
         "⚙️ Настройки": show_settings_menu,
         "💰 Ваш баланс": show_balance_menu,
@@ -90,13 +154,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Проверяем, находится ли пользователь в процессе установки баланса
-    if context.user_data.get("setting_balance"):
+    state = flow_state(update, context)
+    if state.get("setting_balance"):
         await process_balance_input(update, context)
         return
-    elif context.user_data.get("resetting_balance"):
+    elif state.get("resetting_balance"):
         await process_reset_balance(update, context)
         return
-    elif context.user_data.get("deleting_all_data"):
+    elif state.get("deleting_all_data"):
         # Для удаления всех данных используем кнопку подтверждения
         await update.message.reply_text(
             "⚠️ Пожалуйста, используйте кнопки для подтверждения:\n"
@@ -105,45 +170,74 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_markup=get_confirmation_keyboard(),
         )
         return
-    elif context.user_data.get("setting_currency"):
+    elif state.get("setting_currency"):
         await process_currency_input(update, context)
         return
+    elif state.get("editing_transaction"):
+        await process_transaction_edit(update, context)
+        return
 
     # Обработка обычного сообщения с операцией
     try:
-        category, amount, is_income = parse_message(text)
-        add_transaction(
+        category, amount, is_income, currency, note = parse_message(text)
+        today = clock.today()
+
+        # Операция в валюте переводится в рубли по курсу на дату операции
+        original_amount = None
+        amount_text = f"{amount} руб."
+        if currency:
+            original_amount = amount
+            amount = convert_to_rub(original_amount, currency, get_rates(today))
+            if amount is None:
+                await update.message.reply_text(
+                    f"❌ Нет курса {currency} на {today}, запись не добавлена",
+                    reply_markup=get_main_keyboard(),
+                )
+                return
+            amount_text = f"{original_amount} {currency} ({amount:.2f} руб.)"
+
+        budget_status = add_transaction(
             chat_id=chat_id,
-            date=datetime.now().date(),
+            date=today,
             category=category,
             amount=amount,
             is_income=is_income,
+            currency=currency,
+            original_amount=original_amount,
+            note=note,
+            user_id=get_member_id(update, context),
         )
 
         operation_type = "доход" if is_income else "расход"
-        await update.message.reply_text(
-            f"✅ Запись добавлена: {category} - {amount} руб. ({operation_type})",
-            reply_markup=get_main_keyboard(),
+        message = f"✅ Запись добавлена: {category} - {amount_text} ({operation_type})"
+        if note:
+            message += f"\n📝 {note}"
+        if budget_status:
+            message += format_budget_warning(category, amount, budget_status.spent, budget_status.budget_limit)
+        await update.message.reply_text(message, reply_markup=get_main_keyboard())
+        logger.info(
+            "✅ User %s added %s: %s - %s", chat_id, operation_type, category, amount_text,
+            extra={"event": "transaction_added"},
         )
-        logger.info(f"✅ User {chat_id} added {operation_type}: {category} - {amount}")
     except ValueError as e:
         await update.message.reply_text(str(e), reply_markup=get_main_keyboard())
-        logger.warning(f"User {chat_id} input error: {e}")
+        logger.warning("User %s input error: %s", chat_id, e)
     except Exception as e:
         await update.message.reply_text(
             "❌ Произошла ошибка при добавлении записи",
             reply_markup=get_main_keyboard(),
         )
-        logger.error(f"Database error for user {chat_id}: {e}")
+        logger.error("Database error for user %s: %s", chat_id, e)
 
 # Главное меню
 async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показывает главное меню с балансами"""
     chat_id = update.effective_chat.id
-    current_balance = get_user_balance(chat_id)
 
-    # Получаем валютные балансы пользователя
-    currencies = get_user_currencies(chat_id)
+    # Баланс, валютные балансы и последняя операция одним запросом
+    snapshot = get_user_snapshot(chat_id)
+    current_balance = snapshot.balance
+    currencies = snapshot.currencies
 
     # Формируем сообщение с балансами
     message = f"Главное меню\n\n💵 Текущий баланс: {current_balance:.2f} ₽"
@@ -154,11 +248,61 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for currency in currencies:
             symbol = CURRENCY_SYMBOLS.get(currency.currency, currency.currency)
             message += f"• {currency.currency}: {currency.amount:.2f}{symbol}\n"
+        message += format_total_in_rub(current_balance, currencies)
     else:
         message += "\n\n💱 Валютные балансы отсутствуют\nДля добавления перейдите в Настройки → Валюты"
 
+    if snapshot.last_transaction:
+        message += f"\n\n🕘 Последняя операция: {format_transaction(snapshot.last_transaction)}"
+
     await update.message.reply_text(message, reply_markup=get_main_keyboard())
 
+# Автор операции в групповом чате (в личном - None). Имя сохраняется при первой записи участника и при смене
+def get_member_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat, user = update.effective_chat, update.effective_user
+    if chat.type == "private" or user is None:
+        return None
+    members = context.chat_data.setdefault("members", {})
+    if members.get(user.id) != user.full_name:
+        save_chat_member(chat.id, user.id, user.full_name)
+        members[user.id] = user.full_name
+    return user.id
+
+# Статистика по участникам группы: "👤 Анна: -5000.00 ₽ / +1000.00 ₽ (12 оп.)"
+def format_member_statistics(rows):
+    if not rows:
+        return ""
+    message = "👥 По участникам:\n"
+    for row in rows:
+        name = row.name or ("без автора" if row.user_id is None else f"id {row.user_id}")
+        message += (
+            f"      • {name}: -{Money(row.expenses):.2f} ₽ / +{Money(row.income):.2f} ₽ ({row.operations} оп.)\n"
+        )
+    return message + "\n"
+
+# Операция одной строкой: "2026-10-19 продукты -1500.00 ₽" (для валютных - с суммой в валюте)
+def format_transaction(transaction):
+    sign = "+" if transaction.type == "income" else "-"
+    message = f"{transaction.date} {transaction.category} {sign}{transaction.amount:.2f} ₽"
+    if transaction.currency:
+        message += f" ({transaction.original_amount} {transaction.currency})"
+    if transaction.note:
+        message += f" 📝 {transaction.note}"
+    return message
+
+# Общий баланс всех счетов в рублях по текущему курсу
+def format_total_in_rub(rub_balance, currencies):
+    try:
+        total, missing = get_total_in_rub(rub_balance, currencies, get_rates())
+    except Exception as e:
+        logger.error("Error converting balances to RUB: %s", e)
+        return ""
+
+    message = f"\n💰 Всего в рублях: ≈ {total:.2f} ₽\n"
+    if missing:
+        message += f"      (нет курса для: {', '.join(missing)})\n"
+    return message
+
 # Меню статистики
 async def show_statistics_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показывает меню статистики"""
@@ -171,13 +315,11 @@ async def show_statistics_menu(update: Update, context: ContextTypes.DEFAULT_TYP
 async def show_settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
-    current_balance = get_user_balance(chat_id)
-    transactions = get_transactions(chat_id)
-    transactions_count = len(transactions)
-
-    # Получаем количество валют пользователя
-    currencies = get_user_currencies(chat_id)
-    currencies_count = len(currencies)
+    # Баланс, число операций и валют одним запросом
+    snapshot = get_user_snapshot(chat_id)
+    current_balance = snapshot.balance
+    transactions_count = snapshot.transactions_count
+    currencies_count = len(snapshot.currencies)
     await update.message.reply_text(
         f"───────── • ✦ • ─────────\n"
         f"                Настройки\n"
@@ -196,14 +338,13 @@ async def show_settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
 # Меню баланса
 async def show_balance_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    current_balance = get_user_balance(chat_id)
+    current_balance = get_user_snapshot(chat_id).balance
     message = "───────── • ✦ • ─────────\n"
     message += "         Управление балансом\n"
     message += "───────── • ✦ • ─────────\n\n"
 
     if current_balance:
         message += f"Текущий баланс: {current_balance:.2f} ₽\n"
-        current_balance = get_user_balance(chat_id)
     else:
         message += "У вас нет денег на счету\n"
 
@@ -216,9 +357,9 @@ async def show_balance_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # Установка баланса
 async def start_set_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    current_balance = get_user_balance(chat_id)
+    current_balance = get_user_snapshot(chat_id).balance
 
-    context.user_data["setting_balance"] = True
+    flow_state(update, context)["setting_balance"] = True
 
     await update.message.reply_text(
         f"💰 Установка баланса\n\n"
@@ -235,20 +376,19 @@ async def process_balance_input(update: Update, context: ContextTypes.DEFAULT_TY
 
     try:
         # Парсим число, убираем пробелы и заменяем запятые на точки
-        balance_text = text.replace(" ", "").replace(",", ".")
-        new_balance = float(balance_text)
+        new_balance = Money.parse(text)
 
         # Устанавливаем новый баланс
         reset_user_balance(chat_id, new_balance)
 
         # Очищаем состояние
-        context.user_data.pop("setting_balance", None)
+        flow_state(update, context).pop("setting_balance", None)
 
         await update.message.reply_text(
             f"✅ Баланс успешно установлен: {new_balance:.2f} руб.",
             reply_markup=get_main_keyboard(),
         )
-        logger.info(f"✅ User {chat_id} set balance to: {new_balance}")
+        logger.info("✅ User %s set balance to: %s", chat_id, new_balance)
 
     except ValueError:
         await update.message.reply_text(
@@ -256,19 +396,19 @@ async def process_balance_input(update: Update, context: ContextTypes.DEFAULT_TY
             reply_markup=get_cancel_keyboard(),
         )
     except Exception as e:
-        logger.error(f"Error setting balance for user {chat_id}: {e}")
+        logger.error("Error setting balance for user %s: %s", chat_id, e)
         await update.message.reply_text(
             "❌ Произошла ошибка при установке баланса",
             reply_markup=get_main_keyboard(),
         )
-        context.user_data.pop("setting_balance", None)
+        flow_state(update, context).pop("setting_balance", None)
 
 # Начало удаления баланса
 async def start_reset_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    current_balance = get_user_balance(chat_id)
+    current_balance = get_user_snapshot(chat_id).balance
 
-    context.user_data["resetting_balance"] = True
+    flow_state(update, context)["resetting_balance"] = True
 
     await update.message.reply_text(
         f"🔄 Сброс баланса\n\n"
@@ -287,23 +427,23 @@ async def process_reset_balance(update: Update, context: ContextTypes.DEFAULT_TY
     if text == "ДА":
         try:
             # Сбрасываем баланс
-            reset_user_balance(chat_id, 0)
+            reset_user_balance(chat_id, Money(0))
 
             # Очищаем состояние
-            context.user_data.pop("resetting_balance", None)
+            flow_state(update, context).pop("resetting_balance", None)
 
             await update.message.reply_text(
                 "✅ Баланс успешно сброшен до 0 руб.", reply_markup=get_main_keyboard()
             )
-            logger.info(f"✅ User {chat_id} reset balance to 0")
+            logger.info("✅ User %s reset balance to 0", chat_id)
 
         except Exception as e:
-            logger.error(f"Error resetting balance for user {chat_id}: {e}")
+            logger.error("Error resetting balance for user %s: %s", chat_id, e)
             await update.message.reply_text(
                 "❌ Произошла ошибка при сбросе баланса",
                 reply_markup=get_main_keyboard(),
             )
-            context.user_data.pop("resetting_balance", None)
+            flow_state(update, context).pop("resetting_balance", None)
     else:
         await update.message.reply_text(
             "❌ Сброс баланса отменен. Введите 'ДА' для подтверждения или '❌ Отмена' для выхода:",
@@ -317,12 +457,12 @@ async def process_reset_balance(update: Update, context: ContextTypes.DEFAULT_TY
 async def start_delete_all_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
-    # Получаем статистику пользователя
-    transactions = get_transactions(chat_id)
-    transactions_count = len(transactions)
-    current_balance = get_user_balance(chat_id)
+    # Получаем статистику пользователя одним запросом
+    snapshot = get_user_snapshot(chat_id)
+    transactions_count = snapshot.transactions_count
+    current_balance = snapshot.balance
 
-    context.user_data["deleting_all_data"] = True
+    flow_state(update, context)["deleting_all_data"] = True
 
     await update.message.reply_text(
         f"🗑️ Сброс всех данных\n\n"
@@ -337,62 +477,65 @@ async def start_delete_all_data(update: Update, context: ContextTypes.DEFAULT_TY
         reply_markup=get_confirmation_keyboard(),
     )
 
-# Удаление всех данных
+# Удаление всех данных: операции удаляются в фоне пачками, прогресс - правкой сообщения
 async def process_delete_all_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
     try:
-        # Удаляем все данные пользователя
-        transactions_deleted, balance_deleted, currencies_deleted = (
-            delete_all_user_data(chat_id)
-        )
+        job, created = await asyncio.to_thread(start_user_data_wipe, chat_id)
 
         # Очищаем состояние
-        context.user_data.pop("deleting_all_data", None)
+        flow_state(update, context).pop("deleting_all_data", None)
+
+        if not created:
+            await update.message.reply_text(
+                f"⏳ Удаление данных уже идёт\n{format_wipe_progress(job.deleted, job.total)}",
+                reply_markup=get_main_keyboard(),
+            )
+            return
 
         await update.message.reply_text(
-            f"✅ Все данные успешно удалены!\n\n"
-            f"Удалено:\n"
-            f"• Операций расходов/доходов: {transactions_deleted}\n"
-            f"• Записей баланса: {balance_deleted}\n"
-            f"• Валютных балансов: {currencies_deleted}\n\n"
-            f"Бот готов к работе с чистого листа!",
+            "✅ Балансы, валютные счета, бюджеты, подписки и регулярные операции удалены.\n"
+            "Операции удаляются в фоне - ботом можно пользоваться, прогресс ниже",
             reply_markup=get_main_keyboard(),
         )
-        logger.info(
-            f"✅ User {chat_id} deleted all data: {transactions_deleted} transactions, {balance_deleted} balance records, {currencies_deleted} currency records"
-        )
+        progress = await update.message.reply_text(format_wipe_progress(0, job.total))
+        await asyncio.to_thread(set_wipe_message, chat_id, progress.message_id)
+        context.application.create_task(run_wipe_job(context.bot, chat_id, progress.message_id))
+        logger.info("✅ User %s started deleting all data: %s transactions", chat_id, job.total)
 
     except Exception as e:
-        logger.error(f"Error deleting all data for user {chat_id}: {e}")
+        logger.error("Error deleting all data for user %s: %s", chat_id, e)
         await update.message.reply_text(
             "❌ Произошла ошибка при удалении данных", reply_markup=get_main_keyboard()
         )
-        context.user_data.pop("deleting_all_data", None)
+        flow_state(update, context).pop("deleting_all_data", None)
 
 # Отмена операции? Тоже надо проверить
 async def cancel_operation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Очищаем состояния
-    context.user_data.pop("setting_balance", None)
-    context.user_data.pop("resetting_balance", None)
-    context.user_data.pop("deleting_all_data", None)
-    context.user_data.pop("setting_currency", None)
+    state = flow_state(update, context)
+    state.pop("setting_balance", None)
+    state.pop("resetting_balance", None)
+    state.pop("deleting_all_data", None)
+    state.pop("setting_currency", None)
+    state.pop("editing_transaction", None)
 
     chat_id = update.effective_chat.id
-    current_balance = get_user_balance(chat_id)
+    current_balance = get_user_snapshot(chat_id).balance
 
     await update.message.reply_text(
         f"Операция отменена.\n\nТекущий баланс: {current_balance:.2f} руб.",
         reply_markup=get_main_keyboard(),
     )
-    logger.info(f"✅ User {chat_id} cancelled operation")
+    logger.info("✅ User %s cancelled operation", chat_id)
 
 
 ''' Функции для работы с валютами '''
 
 async def show_currencies_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    currencies = get_user_currencies(chat_id)
+    currencies = get_user_snapshot(chat_id).currencies
     message = "───────── • ✦ • ─────────\n"
     message += "         Управление валютами\n"
     message += "───────── • ✦ • ─────────\n\n"
@@ -413,7 +556,7 @@ async def show_currencies_menu(update: Update, context: ContextTypes.DEFAULT_TYP
 
 async def show_delete_currency_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    currencies = get_user_currencies(chat_id)
+    currencies = get_user_snapshot(chat_id).currencies
 
     if not currencies:
         await update.message.reply_text(
@@ -423,6 +566,7 @@ async def show_delete_currency_menu(update: Update, context: ContextTypes.DEFAUL
         return
 
     await update.message.reply_text(
+        "Выберите валюту для удаления:",
         reply_markup=get_delete_currency_keyboard(currencies),
     )
 
@@ -430,7 +574,7 @@ async def show_delete_currency_menu(update: Update, context: ContextTypes.DEFAUL
 async def start_set_currency(update: Update, context: ContextTypes.DEFAULT_TYPE, currency: str):
     chat_id = update.effective_chat.id
 
-    context.user_data["setting_currency"] = currency
+    flow_state(update, context)["setting_currency"] = currency
 
     symbol = CURRENCY_SYMBOLS.get(currency, currency)
 
@@ -458,10 +602,10 @@ async def open_currency_balance(update: Update, context: ContextTypes.DEFAULT_TY
             f"Для списания используйте: '{currency}, -30'",
             reply_markup=get_currencies_keyboard(),
         )
-        logger.info(f"✅ User {chat_id} opened {currency} balance: {current_balance}")
+        logger.info("✅ User %s opened %s balance: %s", chat_id, currency, current_balance)
 
     except Exception as e:
-        logger.error(f"Error opening {currency} balance for user {chat_id}: {e}")
+        logger.error("Error opening %s balance for user %s: %s", currency, chat_id, e)
         await update.message.reply_text(
             f"❌ Произошла ошибка при открытии баланса {currency}",
             reply_markup=get_currencies_keyboard(),
@@ -471,18 +615,17 @@ async def open_currency_balance(update: Update, context: ContextTypes.DEFAULT_TY
 async def process_currency_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     text = update.message.text
-    currency = context.user_data.get("setting_currency")
+    currency = flow_state(update, context).get("setting_currency")
 
     try:
         # Парсим число, убираем пробелы и заменяем запятые на точки
-        amount_text = text.replace(" ", "").replace(",", ".")
-        amount = float(amount_text)
+        amount = Money.parse(text)
 
         # Устанавливаем валютный баланс
         update_user_currency(chat_id, currency, amount)
 
         # Очищаем состояние
-        context.user_data.pop("setting_currency", None)
+        flow_state(update, context).pop("setting_currency", None)
 
         symbol = CURRENCY_SYMBOLS.get(currency, currency)
 
@@ -490,7 +633,7 @@ async def process_currency_input(update: Update, context: ContextTypes.DEFAULT_T
             f"✅ Баланс {currency} успешно установлен: {amount:.2f}{symbol}",
             reply_markup=get_currencies_keyboard(),
         )
-        logger.info(f"✅ User {chat_id} set {currency} balance to: {amount}")
+        logger.info("✅ User %s set %s balance to: %s", chat_id, currency, amount)
 
     except ValueError:
         symbol = CURRENCY_SYMBOLS.get(currency, currency)
@@ -499,12 +642,12 @@ async def process_currency_input(update: Update, context: ContextTypes.DEFAULT_T
             reply_markup=get_cancel_keyboard(),
         )
     except Exception as e:
-        logger.error(f"Error setting {currency} balance for user {chat_id}: {e}")
+        logger.error("Error setting %s balance for user %s: %s", currency, chat_id, e)
         await update.message.reply_text(
             f"❌ Произошла ошибка при установке баланса {currency}",
             reply_markup=get_currencies_keyboard(),
         )
-        context.user_data.pop("setting_currency", None)
+        flow_state(update, context).pop("setting_currency", None)
 
 
 async def delete_currency(update: Update, context: ContextTypes.DEFAULT_TYPE, currency: str):
@@ -518,7 +661,7 @@ async def delete_currency(update: Update, context: ContextTypes.DEFAULT_TYPE, cu
                 f"✅ Баланс {currency} успешно удален",
                 reply_markup=get_currencies_keyboard(),
             )
-            logger.info(f"✅ User {chat_id} deleted {currency} balance")
+            logger.info("✅ User %s deleted %s balance", chat_id, currency)
         else:
             await update.message.reply_text(
                 f"❌ Баланс {currency} не найден",
@@ -526,23 +669,212 @@ async def delete_currency(update: Update, context: ContextTypes.DEFAULT_TYPE, cu
             )
 
     except Exception as e:
-        logger.error(f"Error deleting {currency} balance for user {chat_id}: {e}")
+        logger.error("Error deleting %s balance for user %s: %s", currency, chat_id, e)
         await update.message.reply_text(
             f"❌ Произошла ошибка при удалении баланса {currency}",
             reply_markup=get_currencies_keyboard(),
         )
 
+''' Функции для работы с бюджетами '''
+
+# Предупреждение, если операция перешла порог 80% или 100% бюджета
+def format_budget_warning(category, amount, spent, budget_limit):
+    if not budget_limit:
+        return ""
+
+    # Сравнение в целых копейках: previous * 100 < limit * threshold <= spent * 100
+    previous = spent - amount
+    for threshold in reversed(BUDGET_WARNING_THRESHOLDS):
+        if previous.minor * 100 < budget_limit.minor * threshold <= spent.minor * 100:
+            percent = spent.minor * 100 / budget_limit.minor
+            icon = "🚨" if threshold >= 100 else "⚠️"
+            return (
+                f"\n\n{icon} Бюджет «{category}»: потрачено {spent:.2f} из {budget_limit:.2f} ₽ ({percent:.0f}%)"
+            )
+    return ""
+
+# /budget - список бюджетов, /budget продукты 30000 - установка, /budget продукты 0 - удаление
+async def budget_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    month = clock.today().replace(day=1)
+
+    try:
+        if context.args:
+            category, amount = parse_budget(" ".join(context.args))
+            if amount:
+                spent = set_budget(chat_id, category, amount, month)
+                await update.message.reply_text(
+                    f"✅ Бюджет «{category}» установлен: {amount:.2f} ₽ в месяц\n"
+                    f"Уже потрачено в этом месяце: {spent:.2f} ₽",
+                    reply_markup=get_main_keyboard(),
+                )
+            elif delete_budget(chat_id, category):
+                await update.message.reply_text(
+                    f"✅ Бюджет «{category}» удалён", reply_markup=get_main_keyboard()
+                )
+            else:
+                await update.message.reply_text(
+                    f"❌ Бюджет «{category}» не найден", reply_markup=get_main_keyboard()
+                )
+            return
+
+        budgets = get_budgets(chat_id, month)
+        message = "───────── • ✦ • ─────────\n"
+        message += "         Бюджеты на месяц\n"
+        message += "───────── • ✦ • ─────────\n\n"
+        if budgets:
+            for budget in budgets:
+                percent = budget.spent.minor * 100 / budget.budget_limit.minor if budget.budget_limit else 0
+                icon = "🚨" if percent >= 100 else "⚠️" if percent >= 80 else "•"
+                message += f"      {icon} {budget.category}: {budget.spent:.2f} / {budget.budget_limit:.2f} ₽ ({percent:.0f}%)\n"
+        else:
+            message += "У вас пока нет бюджетов\n"
+        message += "\nУстановить: /budget продукты 30000\nУдалить: /budget продукты 0"
+
+        await update.message.reply_text(message, reply_markup=get_main_keyboard())
+
+    except ValueError as e:
+        await update.message.reply_text(str(e), reply_markup=get_main_keyboard())
+    except Exception as e:
+        logger.error("Error in budget command for user %s: %s", chat_id, e)
+        await update.message.reply_text(
+            "❌ Ошибка при работе с бюджетом", reply_markup=get_main_keyboard()
+        )
+
+
+''' Функции для сводок '''
+
+# /digest - подписки, /digest неделя - включить/выключить недельную сводку, /digest off - отписаться от всех
+async def digest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    argument = " ".join(context.args or []).strip().lower()
+
+    try:
+        subscriptions = get_digest_subscriptions(chat_id)
+
+        if argument in ("off", "выкл", "стоп"):
+            set_digest_subscription(chat_id, None, False)
+            subscriptions = []
+        elif argument in DIGEST_PERIODS:
+            period = DIGEST_PERIODS[argument]
+            enabled = period not in subscriptions
+            set_digest_subscription(chat_id, period, enabled)
+            subscriptions = [p for p in subscriptions if p != period] + ([period] if enabled else [])
+        elif argument:
+            await update.message.reply_text(
+                "❌ Неизвестный период. Используйте: /digest день, /digest неделя, /digest месяц или /digest off",
+                reply_markup=get_main_keyboard(),
+            )
+            return
+
+        names = {"day": "ежедневная", "week": "еженедельная", "month": "ежемесячная"}
+        message = "───────── • ✦ • ─────────\n"
+        message += "         Сводки\n"
+        message += "───────── • ✦ • ─────────\n\n"
+        for period in ("day", "week", "month"):
+            icon = "✅" if period in subscriptions else "▫️"
+            message += f"      {icon} {names[period]}\n"
+        message += "\nВключить/выключить: /digest день | неделя | месяц\nОтписаться от всех: /digest off"
+
+        await update.message.reply_text(message, reply_markup=get_main_keyboard())
+
+    except Exception as e:
+        logger.error("Error in digest command for user %s: %s", chat_id, e)
+        await update.message.reply_text(
+            "❌ Ошибка при настройке сводок", reply_markup=get_main_keyboard()
+        )
+
+
+''' Функции для регулярных операций '''
+
+# /recurring - список, /recurring месяц аренда, 30000 с 2026-11-01 - добавить, /recurring удалить 3 - удалить
+async def recurring_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    args = context.args or []
+    frequency_names = {"day": "ежедневно", "week": "еженедельно", "month": "ежемесячно"}
+
+    try:
+        if len(args) == 2 and args[0].lower() in ("удалить", "del", "delete"):
+            if not args[1].isdigit():
+                raise ValueError("❌ Укажите номер операции: /recurring удалить 3")
+            if delete_recurring_transaction(chat_id, int(args[1])):
+                message = f"✅ Регулярная операция #{args[1]} удалена"
+            else:
+                message = f"❌ Регулярная операция #{args[1]} не найдена"
+            await update.message.reply_text(message, reply_markup=get_main_keyboard())
+            return
+
+        if args:
+            frequency, category, amount, is_income, start_date = parse_recurring(" ".join(args))
+            recurring_id = add_recurring_transaction(chat_id, category, amount, is_income, frequency, start_date)
+            operation_type = "доход" if is_income else "расход"
+            await update.message.reply_text(
+                f"✅ Регулярная операция #{recurring_id} добавлена: {category} - {amount:.2f} руб. ({operation_type}), "
+                f"{frequency_names[frequency]}\nПервая запись: {start_date}",
+                reply_markup=get_main_keyboard(),
+            )
+            return
+
+        recurring = get_recurring_transactions(chat_id)
+        message = "───────── • ✦ • ─────────\n"
+        message += "     Регулярные операции\n"
+        message += "───────── • ✦ • ─────────\n\n"
+        if recurring:
+            for item in recurring:
+                sign = "+" if item.type == "income" else "-"
+                message += (
+                    f"      #{item.id} {item.category}: {sign}{item.amount:.2f} ₽, "
+                    f"{frequency_names.get(item.frequency, item.frequency)}, следующая {item.next_date}\n"
+                )
+        else:
+            message += "У вас пока нет регулярных операций\n"
+        message += "\nДобавить: /recurring месяц аренда, 30000 с 2026-11-01\nУдалить: /recurring удалить 3"
+
+        await update.message.reply_text(message, reply_markup=get_main_keyboard())
+
+    except ValueError as e:
+        await update.message.reply_text(str(e), reply_markup=get_main_keyboard())
+    except Exception as e:
+        logger.error("Error in recurring command for user %s: %s", chat_id, e)
+        await update.message.reply_text(
+            "❌ Ошибка при работе с регулярными операциями", reply_markup=get_main_keyboard()
+        )
+
+
 ''' Функции для статистики '''
 
-# Отрисовка статистики
+# Отрисовка статистики по кнопкам периода
 async def show_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE, period_type: str):
+    start_date, end_date, period_name = get_period_dates(period_type)   # Получаем даты периода
+    await render_statistics(update, context, start_date, end_date, period_name)
+
+# Статистика за произвольный период: /stats 2026-09-01..2026-09-30, /stats 3m, /stats 2025
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    period_text = " ".join(context.args or []).strip().lower() or "month"
+
     try:
-        chat_id = update.effective_chat.id
+        if period_text in PERIOD_TYPES:
+            start_date, end_date, period_name = get_period_dates(PERIOD_TYPES[period_text])
+        else:
+            start_date, end_date, period_name = parse_period(period_text)
+    except ValueError as e:
+        await update.message.reply_text(
+            f"{e}\n\nПримеры: /stats неделя, /stats 2026-09-01..2026-09-30, /stats последние 3 месяца, /stats 2025",
+            reply_markup=get_statistics_keyboard(),
+        )
+        return
 
-        start_date, end_date, period_name = get_period_dates(period_type)   # Получаем даты периода
+    await render_statistics(update, context, start_date, end_date, period_name)
 
-        transactions = get_transactions_by_period(chat_id, start_date, end_date) # Получаем транзакции за период
-        stats = calculate_statistics(transactions)  # Вызываем функцию подсчёта статистики
+# Отрисовка статистики
+async def render_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE, start_date, end_date, period_name):
+    try:
+        chat_id = update.effective_chat.id
+
+        prev_start_date, prev_end_date = get_previous_period(start_date, end_date)
+        rows = get_period_comparison(chat_id, start_date, end_date, prev_start_date) # Текущий и предыдущий период одним запросом
+        stats = calculate_statistics([row for row in rows if row.amount])  # Вызываем функцию подсчёта статистики
+        prev_stats = calculate_previous_totals(rows)
 
         # Формируем сообщение, заголовок
         message=""
@@ -579,10 +911,20 @@ async def show_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE, pe
             else:
                 message += f"Сегодня вы вышли в ноль\n\n"
 
+        # Сравнение с предыдущим периодом такой же длины
+        message += f"🔁 К прошлому периоду ({prev_start_date} - {prev_end_date}):\n"
+        message += f"      • Доходы: {format_change(stats['total_income'], prev_stats['total_income'])}\n"
+        message += f"      • Расходы: {format_change(stats['total_expenses'], prev_stats['total_expenses'])}\n\n"
+
+        # В групповом чате - кто сколько потратил и заработал
+        if update.effective_chat.type != "private":
+            message += format_member_statistics(get_member_statistics(chat_id, start_date, end_date))
+
         # Итог и валюты
-        current_balance = get_user_balance(chat_id)
+        snapshot = get_user_snapshot(chat_id)
+        current_balance = snapshot.balance
 
-        currencies = get_user_currencies(chat_id)
+        currencies = snapshot.currencies
         currency_text = ""
 
         for currency in currencies:
@@ -593,6 +935,7 @@ async def show_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE, pe
             message += f"───────── • ✦ • ─────────\n"
             message += f"                        Баланс\n"
             message += f"  {current_balance:.2f} ₽{currency_text}\n"
+            message += format_total_in_rub(current_balance, currencies)
             message += f"───────── • ✦ • ─────────\n"
         else:
             message += f"───────── • ✦ • ─────────\n"
@@ -601,32 +944,332 @@ async def show_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE, pe
             message += f"───────── • ✦ • ─────────\n"
 
         await update.message.reply_text(message, reply_markup=get_statistics_keyboard())
-        logger.info(f"✅ User {chat_id} viewed {period_type} statistics")
+        logger.info(
+            "✅ User %s viewed %s statistics", chat_id, period_name, extra={"event": "statistics_viewed"}
+        )
 
     except Exception as e:
-        logger.error(f"Error in {period_type} statistics for user {chat_id}: {e}")
+        logger.error("Error in %s statistics for user %s: %s", period_name, chat_id, e)
         await update.message.reply_text(
             "❌ Ошибка при получении статистики", reply_markup=get_statistics_keyboard()
         )
 
+''' История операций '''
+
+# Текст и кнопки страницы истории
+def build_history_page(chat_id, cursor=None, direction="older"):
+    rows, has_older, has_newer = get_transactions_page(chat_id, cursor, direction, HISTORY_PAGE_SIZE)
+    if not rows and cursor is not None:
+        # Страница опустела (операции удалены) - показываем самые новые
+        rows, has_older, has_newer = get_transactions_page(chat_id, limit=HISTORY_PAGE_SIZE)
+    if not rows:
+        return "📜 Операций пока нет", None
+
+    message = "📜 История операций (от новых к старым)\n\n"
+    message += "\n".join(f"{number}. {format_transaction(row)}" for number, row in enumerate(rows, start=1))
+    message += "\n\nВыберите номер операции, чтобы изменить или удалить её"
+    return message, get_history_keyboard(rows, has_older, has_newer)
+
+# Курсор из callback_data: "2026-10-19", "123" -> (date, id)
+def parse_history_cursor(date_text, transaction_id):
+    return date.fromisoformat(date_text), int(transaction_id)
+
+# История операций: /history
+async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    try:
+        message, markup = build_history_page(chat_id)
+        await update.message.reply_text(message, reply_markup=markup)
+    except Exception as e:
+        logger.error("Error showing history for user %s: %s", chat_id, e)
+        await update.message.reply_text("❌ Ошибка при получении истории", reply_markup=get_main_keyboard())
+
+# Кнопки истории: листание, выбор операции, удаление и изменение суммы
+async def history_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    chat_id = update.effective_chat.id
+
+    try:
+        _, action, *args = query.data.split(":")
+
+        if action in ("older", "newer", "from"):
+            flow_state(update, context).pop("editing_transaction", None)
+            message, markup = build_history_page(chat_id, parse_history_cursor(*args), action)
+            await query.edit_message_text(message, reply_markup=markup)
+            return
+
+        transaction_id, page = int(args[0]), f"{args[1]}:{args[2]}"
+        cursor = parse_history_cursor(args[1], args[2])
+
+        if action == "delok":
+            deleted = delete_transaction(chat_id, transaction_id)
+            message, markup = build_history_page(chat_id, cursor, "from")
+            if deleted:
+                sign = "+" if deleted.type == "income" else "-"
+                message = f"🗑️ Удалено: {deleted.category} {sign}{deleted.amount:.2f} ₽\n\n" + message
+            await query.edit_message_text(message, reply_markup=markup)
+            return
+
+        transaction = get_transaction(chat_id, transaction_id)
+        if transaction is None:
+            message, markup = build_history_page(chat_id, cursor, "from")
+            await query.edit_message_text("❌ Операция не найдена\n\n" + message, reply_markup=markup)
+            return
+
+        if action == "row":
+            await query.edit_message_text(
+                f"🧾 {format_transaction(transaction)}", reply_markup=get_history_row_keyboard(transaction_id, page)
+            )
+        elif action == "del":
+            await query.edit_message_text(
+                f"⚠️ Удалить операцию?\n{format_transaction(transaction)}\n\nБаланс и бюджет будут пересчитаны",
+                reply_markup=get_history_delete_keyboard(transaction_id, page),
+            )
+        elif action == "edit":
+            flow_state(update, context)["editing_transaction"] = {"id": transaction_id, "page": page}
+            currency = transaction.currency or "руб."
+            await query.edit_message_text(
+                f"✏️ {format_transaction(transaction)}\n\nВведите новую сумму ({currency}):",
+                reply_markup=get_history_cancel_keyboard(page),
+            )
+    except Exception as e:
+        logger.error("Error in history action %s for user %s: %s", query.data, chat_id, e)
+        await query.edit_message_text("❌ Ошибка при работе с историей")
+
+# Новая сумма операции из истории
+async def process_transaction_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    editing = flow_state(update, context)["editing_transaction"]
+
+    try:
+        amount = Money.parse(update.message.text)
+        if amount <= 0:
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text(
+            "❌ Неверный формат числа. Введите сумму больше нуля (например: 1500 или 1500.50):",
+            reply_markup=get_history_cancel_keyboard(editing["page"]),
+        )
+        return
+
+    flow_state(update, context).pop("editing_transaction", None)
+    try:
+        transaction = get_transaction(chat_id, editing["id"])
+        if transaction is None:
+            await update.message.reply_text("❌ Операция не найдена", reply_markup=get_main_keyboard())
+            return
+
+        # Сумма в валюте переводится в рубли по курсу на дату операции, как при добавлении
+        original_amount = None
+        if transaction.currency:
+            original_amount = amount
+            amount = convert_to_rub(original_amount, transaction.currency, get_rates(transaction.date))
+            if amount is None:
+                await update.message.reply_text(
+                    f"❌ Нет курса {transaction.currency} на {transaction.date}, сумма не изменена",
+                    reply_markup=get_main_keyboard(),
+                )
+                return
+
+        old = update_transaction_amount(chat_id, transaction.id, amount, original_amount)
+        if old is None:
+            await update.message.reply_text("❌ Операция не найдена", reply_markup=get_main_keyboard())
+            return
+
+        message, markup = build_history_page(chat_id, parse_history_cursor(*editing["page"].split(":")), "from")
+        await update.message.reply_text(
+            f"✅ Сумма изменена: {old.category} {old.old_amount:.2f} → {amount:.2f} ₽\n\n" + message,
+            reply_markup=markup,
+        )
+    except Exception as e:
+        logger.error("Error editing transaction for user %s: %s", chat_id, e)
+        await update.message.reply_text("❌ Ошибка при изменении операции", reply_markup=get_main_keyboard())
+
+''' Поиск операций '''
+
+# Текст и кнопки страницы результатов поиска
+def build_search_page(chat_id, search, cursor=None, direction="older"):
+    rows, has_older, has_newer = search_transactions(
+        chat_id, *search, cursor=cursor, direction=direction, limit=HISTORY_PAGE_SIZE
+    )
+    if not rows:
+        return "🔍 Ничего не найдено", None
+
+    message = "🔍 Найденные операции (от новых к старым)\n\n"
+    message += "\n".join(format_transaction(row) for row in rows)
+    return message, get_search_keyboard(rows, has_older, has_newer)
+
+# Поиск операций: /find такси, /find кофе >300 2026-09
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    try:
+        search = parse_search(" ".join(context.args or []))
+        message, markup = build_search_page(chat_id, search)
+        # Условия поиска нужны для листания: в callback_data они не помещаются
+        flow_state(update, context)["search"] = search
+        await update.message.reply_text(message, reply_markup=markup)
+    except ValueError as e:
+        await update.message.reply_text(str(e), reply_markup=get_main_keyboard())
+    except Exception as e:
+        logger.error("Error searching transactions for user %s: %s", chat_id, e)
+        await update.message.reply_text("❌ Ошибка при поиске операций", reply_markup=get_main_keyboard())
+
+# Листание результатов поиска
+async def find_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    chat_id = update.effective_chat.id
+
+    search = flow_state(update, context).get("search")
+    if search is None:
+        await query.edit_message_text("ℹ️ Результаты поиска устарели, повторите /find")
+        return
+
+    try:
+        _, direction, *args = query.data.split(":")
+        message, markup = build_search_page(chat_id, search, parse_history_cursor(*args), direction)
+        await query.edit_message_text(message, reply_markup=markup)
+    except Exception as e:
+        logger.error("Error paging search results for user %s: %s", chat_id, e)
+        await query.edit_message_text("❌ Ошибка при поиске операций")
+
+''' Графики '''
+
+# Графики по кнопке периода
+async def show_charts(update: Update, context: ContextTypes.DEFAULT_TYPE, period_type: str):
+    start_date, end_date, period_name = get_period_dates(period_type)
+    await render_charts(update, context, start_date, end_date, period_name)
+
+# Графики за произвольный период: /chart 2026-09, /chart последние 3 месяца
+async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    period_text = " ".join(context.args or []).strip().lower() or "month"
+
+    try:
+        if period_text in PERIOD_TYPES:
+            start_date, end_date, period_name = get_period_dates(PERIOD_TYPES[period_text])
+        else:
+            start_date, end_date, period_name = parse_period(period_text)
+    except ValueError as e:
+        await update.message.reply_text(
+            f"{e}\n\nПримеры: /chart неделя, /chart 2026-09, /chart последние 3 месяца",
+            reply_markup=get_statistics_keyboard(),
+        )
+        return
+
+    await render_charts(update, context, start_date, end_date, period_name)
+
+# Отправка графиков: круговая диаграмма по категориям и расходы по дням
+async def render_charts(update: Update, context: ContextTypes.DEFAULT_TYPE, start_date, end_date, period_name):
+    chat_id = update.effective_chat.id
+
+    try:
+        rows = get_chart_data(chat_id, start_date, end_date)
+        if not rows:
+            await update.message.reply_text(
+                f"📉 Расходов за {period_name} не было", reply_markup=get_statistics_keyboard()
+            )
+            return
+
+        categories, labels, values = build_chart_series(rows, start_date, end_date)
+        version = get_data_version(categories, values)
+        period_key = f"{start_date}:{end_date}"
+
+        charts = [
+            ("pie", f"Расходы по категориям {period_name}", render_pie_chart, (f"Расходы {period_name}", categories)),
+            ("bar", f"Расходы по дням {period_name}", render_bar_chart, (f"Расходы {period_name}", labels, values)),
+        ]
+        for kind, caption, render_func, args in charts:
+            key = (chat_id, period_key, kind, version)
+            photo = get_cached_chart(key)  # file_id уже загруженного фото или PNG
+            if photo is None:
+                photo = await render_chart(render_func, *args)
+
+            sent = await update.message.reply_photo(
+                photo=photo, caption=caption, reply_markup=get_statistics_keyboard()
+            )
+            cache_chart(key, sent.photo[-1].file_id)  # Повторные просмотры отправляют file_id без загрузки
+
+        logger.info("✅ User %s viewed %s charts", chat_id, period_name, extra={"event": "charts_viewed"})
+
+    except Exception as e:
+        logger.error("Error in %s charts for user %s: %s", period_name, chat_id, e)
+        await update.message.reply_text(
+            "❌ Ошибка при построении графиков", reply_markup=get_statistics_keyboard()
+        )
+
+# История баланса: /balance 2026-10-01 - баланс на конец дня, /balance 2026-09 или /balance 3m - график за период
+async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    period_text = " ".join(context.args or []).strip().lower() or "30d"
+
+    try:
+        if period_text in PERIOD_TYPES:
+            start_date, end_date, period_name = get_period_dates(PERIOD_TYPES[period_text])
+        else:
+            start_date, end_date, period_name = parse_period(period_text)
+    except ValueError as e:
+        await update.message.reply_text(
+            f"{e}\n\nПримеры: /balance 2026-10-01, /balance 2026-09, /balance последние 3 месяца",
+            reply_markup=get_statistics_keyboard(),
+        )
+        return
+
+    today = clock.today()
+    if start_date > today:
+        await update.message.reply_text("ℹ️ Этот день ещё не наступил", reply_markup=get_statistics_keyboard())
+        return
+
+    try:
+        if start_date == end_date:
+            balance = get_balance_on(chat_id, start_date)
+            await update.message.reply_text(
+                f"💰 Баланс на конец {start_date}: {balance:.2f} ₽", reply_markup=get_statistics_keyboard()
+            )
+            return
+
+        series = get_balance_series(chat_id, start_date, end_date)
+        labels = [day.strftime("%d.%m") for day, _ in series]
+        values = [balance for _, balance in series]
+        lowest = min(series, key=lambda item: item[1])
+        highest = max(series, key=lambda item: item[1])
+        caption = (
+            f"💰 Баланс {period_name}\n"
+            f"Начало: {values[0]:.2f} ₽, конец: {values[-1]:.2f} ₽\n"
+            f"Минимум: {lowest[1]:.2f} ₽ ({lowest[0]}), максимум: {highest[1]:.2f} ₽ ({highest[0]})"
+        )
+
+        key = (chat_id, f"{start_date}:{end_date}", "balance", get_data_version(values))
+        photo = get_cached_chart(key)
+        if photo is None:
+            photo = await render_chart(render_line_chart, f"Баланс {period_name}", labels, values)
+        sent = await update.message.reply_photo(photo=photo, caption=caption, reply_markup=get_statistics_keyboard())
+        cache_chart(key, sent.photo[-1].file_id)
+
+    except Exception as e:
+        logger.error("Error showing balance history for user %s: %s", chat_id, e)
+        await update.message.reply_text(
+            "❌ Ошибка при получении истории баланса", reply_markup=get_statistics_keyboard()
+        )
+
 # Рассчёт статистики
 def calculate_statistics(transactions):
     expenses_by_category = {}   # Расходы по категориям (я так понимаю)
     income_by_category = {} # Поступления по категориям (я так понимаю)
-    total_expenses = 0  # Итоговые расходы
-    total_income = 0    # Итоговые доходы
+    total_expenses = Money(0)  # Итоговые расходы
+    total_income = Money(0)    # Итоговые доходы
     
     for transaction in transactions:    # Для транзакций из таблицы
         if transaction.type == 'income':    # Если тип транзакции - поступление
             category = transaction.category # Группируем расходы по категориям
             if category not in income_by_category:  # Если категория не в списке
-                income_by_category[category] = 0    # Доход по категориям равен нулю
+                income_by_category[category] = Money(0)    # Доход по категориям равен нулю
             income_by_category[category] += transaction.amount  # Доход по категории += сумме транзакции
             total_income += transaction.amount  # Итоговый доход += Сумме транзакции
         else:
             category = transaction.category # Группируем расходы по категориям
             if category not in expenses_by_category:    # Если категория не в списке
-                expenses_by_category[category] = 0  # Расход по категориям равен нулю
+                expenses_by_category[category] = Money(0)  # Расход по категориям равен нулю
             expenses_by_category[category] += transaction.amount # Расход по категории += сумме транзакции
             total_expenses += transaction.amount    # Итоговый расход += Сумме транзакции
     
@@ -642,9 +1285,28 @@ def calculate_statistics(transactions):
         'daily_balance': daily_balance # Выхлоп за сегодня (чистый доход/расход)
     }
 
+# Итоги предыдущего периода из строк сравнения
+def calculate_previous_totals(rows):
+    total_income = sum((row.prev_amount for row in rows if row.type == 'income'), Money(0))
+    total_expenses = sum((row.prev_amount for row in rows if row.type != 'income'), Money(0))
+    return {'total_income': total_income, 'total_expenses': total_expenses}
+
+# Изменение суммы относительно прошлого периода: "+1200.00 ₽ (+15%)"
+def format_change(current, previous):
+    diff = current - previous
+    if previous:
+        return f"{diff:+.2f} ₽ ({diff.minor * 100 / previous.minor:+.0f}%)"
+    return f"{diff:+.2f} ₽"
+
+# Предыдущий период той же длины, заканчивающийся накануне начала текущего
+def get_previous_period(start_date, end_date):
+    prev_end_date = start_date - timedelta(days=1)
+    prev_start_date = prev_end_date - (end_date - start_date)
+    return prev_start_date, prev_end_date
+
 #Получение периода для рассчёта статистики
 def get_period_dates(period_type):
-    today = datetime.now().date()
+    today = clock.today()
 
     if period_type == "day": 
         start_date = today
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from config import BOT_MODE, HEALTH_LAG_THRESHOLD, HEALTH_MAX_UPDATE_SECONDS, HEALTH_PORT
+from modules.database import check_database, engine, replica_engine
+from modules.sender import sender
+from telegram import Update # type: ignore
+from telegram.ext import ContextTypes # type: ignore
+
+logger = logging.getLogger(__name__)
+
+HTTP_REASONS = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}
+
+
+class HealthMonitor:
+    """Состояние процесса бота: задержка цикла событий, последнее и текущее обновление.
+
+    Задержка измеряется по опозданию периодического таймера. Поток-сторож замечает, что цикл событий
+    завис прямо сейчас, и пишет в лог обрабатываемое обновление и стек - так находятся блокирующие вызовы
+    """
+
+    def __init__(self, interval=0.5, lag_threshold=HEALTH_LAG_THRESHOLD):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0  # Максимум с прошлой проверки /healthz
+        self.heartbeat = time.monotonic()
+        self.last_update_at = None
+        self.current_update = None  # (описание, время начала)
+        self._loop_thread_id = None
+        self._ticker_task = None
+        self._server = None
+        self._stop = threading.Event()
+
+    async def start(self, port):
+        self._loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self._ticker_task = asyncio.create_task(self._ticker())
+        self._stop.clear()
+        threading.Thread(target=self._watchdog, name="health-watchdog", daemon=True).start()
+        if port:
+            self._server = await asyncio.start_server(self._handle_http, "0.0.0.0", port)
+            logger.info("✅ Health endpoints on :%s (/healthz, /readyz)", port)
+
+    async def stop(self):
+        self._stop.set()
+        if self._ticker_task is not None:
+            self._ticker_task.cancel()
+            self._ticker_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # Задержка цикла событий
+
+    async def _ticker(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.heartbeat = now
+            if self.lag > self.lag_threshold:
+                logger.warning(
+                    "⚠️ Event loop lag %.0f ms", self.lag * 1000, extra={"event": "loop_lag"}
+                )
+
+    def _watchdog(self):
+        """Поток-сторож: если таймер в цикле событий давно не срабатывал, цикл занят блокирующим вызовом"""
+        reported = False
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self.heartbeat - self.interval
+            if stalled <= self.lag_threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+            reported = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=12)) if frame else "unknown"
+            current = self.current_update[0] if self.current_update else "no update (job or background task)"
+            logger.warning(
+                "⚠️ Event loop blocked for %.0f ms while handling %s\n%s",
+                stalled * 1000, current, stack, extra={"event": "loop_blocked"},
+            )
+
+    # Обновления
+
+    def update_started(self, update):
+        self.current_update = (describe_update(update), time.monotonic())
+
+    def update_finished(self):
+        self.current_update = None
+        self.last_update_at = time.monotonic()
+
+    # Отчёты
+
+    def report(self):
+        now = time.monotonic()
+        current = None
+        if self.current_update:
+            description, started = self.current_update
+            current = {"update": description, "running_s": round(now - started, 3)}
+        report = {
+            "mode": BOT_MODE,
+            "loop_lag_ms": round(self.lag * 1000, 1),
+            "max_loop_lag_ms": round(self.max_lag * 1000, 1),
+            "last_update_age_s": round(now - self.last_update_at, 1) if self.last_update_at else None,
+            "current_update": current,
+            "db_pool": engine.pool.status(),
+            "send_queue": sender.pending(),
+        }
+        if replica_engine is not None:
+            report["replica_pool"] = replica_engine.pool.status()
+        self.max_lag = 0.0
+        return report
+
+    def liveness(self):
+        """Жив ли процесс: отвечает цикл событий и ни одно обновление не обрабатывается слишком долго"""
+        report = self.report()
+        stuck = report["current_update"] and report["current_update"]["running_s"] > HEALTH_MAX_UPDATE_SECONDS
+        report["status"] = "stuck" if stuck else "ok"
+        return (503 if stuck else 200), report
+
+    async def readiness(self):
+        """Готов ли процесс обслуживать пользователей: жив и база данных отвечает"""
+        status, report = self.liveness()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(check_database), timeout=3)
+            report["database"] = "ok"
+        except Exception as e:
+            report["database"] = f"error: {e.__class__.__name__}"
+            report["status"] = "not ready"
+            status = 503
+        return status, report
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else "/"
+            if path == "/healthz":
+                status, body = self.liveness()
+            elif path == "/readyz":
+                status, body = await self.readiness()
+            else:
+                status, body = 404, {"error": "not found"}
+
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning("⚠️ Health request failed: %s", e)
+        finally:
+            writer.close()
+
+
+def describe_update(update):
+    """Коротко об обновлении для логов - без текста сообщений пользователя"""
+    chat_id = update.effective_chat.id if update.effective_chat else None
+    if update.callback_query:
+        action = f"callback {':'.join(update.callback_query.data.split(':')[:2])}"
+    elif update.message and update.message.text and update.message.text.startswith("/"):
+        action = f"command {update.message.text.split()[0]}"
+    elif update.message:
+        action = "message"
+    else:
+        action = "update"
+    return f"{action} (update {update.update_id}, chat {chat_id})"
+
+
+health_monitor = HealthMonitor()
+
+
+async def track_update_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Первая группа обработчиков: запоминает обрабатываемое обновление"""
+    health_monitor.update_started(update)
+
+
+async def track_update_end(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Последняя группа обработчиков: обновление обработано"""
+    health_monitor.update_finished()
+
+
+async def start_health(application):
+    await health_monitor.start(HEALTH_PORT)
+
+
+async def stop_health(application):
+    await health_monitor.stop()
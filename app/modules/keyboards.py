@@ -1,4 +1,4 @@
-from telegram import KeyboardButton, ReplyKeyboardMarkup # type: ignore
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup # type: ignore
 
 # Главное меню
 def get_main_keyboard():
@@ -11,6 +11,7 @@ def get_statistics_keyboard():
         [KeyboardButton("📅 День")],
         [KeyboardButton("📆 Неделя")],
         [KeyboardButton("📈 Месяц")],
+        [KeyboardButton("🥧 Графики")],
         [KeyboardButton("⬅️ Назад")],
     ]
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
@@ -65,3 +66,58 @@ def get_cancel_keyboard():
 def get_confirmation_keyboard():
     keyboard = [[KeyboardButton("✅ Да")], [KeyboardButton("❌ Отмена")]]
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+
+
+# Позиция операции в истории для callback_data: "2026-10-19:123"
+def history_cursor(row):
+    return f"{row.date.isoformat()}:{row.id}"
+
+# Страница истории: выбор операции по номеру и листание (курсор - первая операция страницы)
+def get_history_keyboard(rows, has_older, has_newer):
+    page = history_cursor(rows[0])
+    numbers = [
+        InlineKeyboardButton(str(number), callback_data=f"hist:row:{row.id}:{page}")
+        for number, row in enumerate(rows, start=1)
+    ]
+    keyboard = [numbers[:5], numbers[5:]] if len(numbers) > 5 else [numbers]
+    keyboard += get_page_navigation("hist", rows, has_older, has_newer)
+    return InlineKeyboardMarkup(keyboard)
+
+# Кнопки листания страниц операций: "<prefix>:newer:<курсор>", "<prefix>:older:<курсор>"
+def get_page_navigation(prefix, rows, has_older, has_newer):
+    navigation = []
+    if has_newer:
+        navigation.append(InlineKeyboardButton("⬅️ Новее", callback_data=f"{prefix}:newer:{history_cursor(rows[0])}"))
+    if has_older:
+        navigation.append(InlineKeyboardButton("Старее ➡️", callback_data=f"{prefix}:older:{history_cursor(rows[-1])}"))
+    return [navigation] if navigation else []
+
+# Страница результатов поиска /find
+def get_search_keyboard(rows, has_older, has_newer):
+    navigation = get_page_navigation("find", rows, has_older, has_newer)
+    return InlineKeyboardMarkup(navigation) if navigation else None
+
+# Действия с операцией из истории
+def get_history_row_keyboard(transaction_id, page):
+    keyboard = [
+        [
+            InlineKeyboardButton("✏️ Изменить сумму", callback_data=f"hist:edit:{transaction_id}:{page}"),
+            InlineKeyboardButton("🗑️ Удалить", callback_data=f"hist:del:{transaction_id}:{page}"),
+        ],
+        [InlineKeyboardButton("⬅️ К списку", callback_data=f"hist:from:{page}")],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+# Подтверждение удаления операции
+def get_history_delete_keyboard(transaction_id, page):
+    keyboard = [
+        [
+            InlineKeyboardButton("✅ Да, удалить", callback_data=f"hist:delok:{transaction_id}:{page}"),
+            InlineKeyboardButton("❌ Отмена", callback_data=f"hist:row:{transaction_id}:{page}"),
+        ],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+# Отмена изменения суммы
+def get_history_cancel_keyboard(page):
+    return InlineKeyboardMarkup([[InlineKeyboardButton("❌ Отмена", callback_data=f"hist:from:{page}")]])
@@ -1,26 +1,231 @@
+import calendar
 import re
+from datetime import date, datetime, timedelta
+
+from modules import clock
+from modules.money import Money
 
 # Списки категорий для доходов
 INCOME_CATEGORIES = ["зарплата", "аванс", "пополнение", "доход", "премия"]
 
 
+# Обозначения валют в сообщении ("Кафе, 20$", "Кафе, 20 usd"). None - рубли
+CURRENCY_ALIASES = {
+    "₽": None, "р": None, "руб": None, "rub": None,
+    "$": "USD", "usd": "USD", "долл": "USD",
+    "¥": "CNY", "cny": "CNY", "юан": "CNY",
+    "€": "EUR", "eur": "EUR", "евро": "EUR",
+}
+
+
+def parse_currency(text: str):
+    """Разбирает обозначение валюты. Возвращает код валюты или None для рублей"""
+    text = text.strip().lower().rstrip(".")
+    if text in CURRENCY_ALIASES:
+        return CURRENCY_ALIASES[text]
+    for alias, currency in CURRENCY_ALIASES.items():
+        if len(alias) > 2 and text.startswith(alias):
+            return currency
+    if re.fullmatch(r"[a-z]{3}", text):
+        return text.upper()
+    raise ValueError(f"❌ Неизвестная валюта: {text}")
+
+
 def parse_message(text: str):
-    parts = re.split(r"\s*,\s*", text.strip())
-    if len(parts) != 2:
-        raise ValueError('❌ Неверный формат. Используйте: "Категория, Сумма"')
+    """Разбирает "Категория, Сумма" или "Категория, Сумма, Заметка".
+
+    Возвращает (category, amount, is_income, currency, note)
+    """
+    parts = re.split(r"\s*,\s*", text.strip(), maxsplit=2)
+    # "Кафе, 1500,50" - не заметка "50", а дробная сумма через запятую, которая не поддерживается
+    if len(parts) < 2 or (len(parts) == 3 and parts[2].isdigit()):
+        raise ValueError('❌ Неверный формат. Используйте: "Категория, Сумма" или "Категория, Сумма, Заметка"')
 
     category = parts[0].strip().lower()
-    try:
-        amount = float(parts[1].replace(" ", ""))
-    except ValueError:
+
+    # Сумма с необязательной валютой: "20", "20 USD", "20$", "$20"
+    match = re.fullmatch(r"([^\d\s.-]*)\s*(-?[\d\s]+(?:\.\d+)?)\s*(\D*)", parts[1].strip())
+    if not match:
         raise ValueError("❌ Сумма должна быть числом")
+    amount = Money.parse(match.group(2))
+
+    currency_text = match.group(1) or match.group(3)
+    currency = parse_currency(currency_text) if currency_text.strip() else None
 
     # Определяем тип операции (доход/расход)
     is_income = category in [cat.lower() for cat in INCOME_CATEGORIES]
 
-    return category, amount, is_income
+    note = parts[2].strip() if len(parts) == 3 and parts[2].strip() else None
+
+    return category, amount, is_income, currency, note
+
+
+def parse_budget(text: str):
+    """Разбирает "категория сумма" для /budget. Сумма 0 или "удалить" - удаление бюджета"""
+    match = re.fullmatch(r"(.+?)\s*,?\s+(\d[\d\s]*(?:[.,]\d+)?|удалить|delete)", text.strip().lower())
+    if not match:
+        raise ValueError('❌ Неверный формат. Используйте: "/budget категория сумма", например "/budget продукты 30000"')
+
+    category = match.group(1).strip()
+    amount_text = match.group(2)
+    if amount_text in ("удалить", "delete"):
+        return category, Money(0)
+    return category, Money.parse(amount_text)
+
+
+# Периодичность регулярных операций
+FREQUENCIES = {
+    "day": "day", "день": "day", "ежедневно": "day",
+    "week": "week", "неделя": "week", "еженедельно": "week",
+    "month": "month", "месяц": "month", "ежемесячно": "month",
+}
+
+
+def parse_recurring(text: str, today: date = None):
+    """Разбирает "месяц аренда, 30000 с 2026-11-01" для /recurring.
+
+    Возвращает (frequency, category, amount, is_income, start_date)
+    """
+    today = today or clock.today()
+    match = re.fullmatch(
+        r"(\S+)\s+(.+?)\s*,\s*(\d[\d\s]*(?:[.,]\d+)?)(?:\s+(?:с\s+|from\s+)?(\d{4}-\d{2}-\d{2}))?",
+        text.strip().lower(),
+    )
+    if not match or match.group(1) not in FREQUENCIES:
+        raise ValueError(
+            '❌ Неверный формат. Используйте: "/recurring месяц аренда, 30000 с 2026-11-01" '
+            "(период: день, неделя или месяц, дата начала необязательна)"
+        )
+
+    category = match.group(2).strip()
+    amount = Money.parse(match.group(3))
+    start_date = datetime.strptime(match.group(4), "%Y-%m-%d").date() if match.group(4) else today
+
+    return FREQUENCIES[match.group(1)], category, amount, is_income_category(category), start_date
 
 
 def is_income_category(category: str) -> bool:
     """Проверяет, является ли категория доходом"""
     return category.lower() in [cat.lower() for cat in INCOME_CATEGORIES]
+
+
+
+# Единицы для относительных периодов ("последние 3 месяца", "2 недели", "3m")
+PERIOD_UNITS = {
+    "d": "days", "day": "days", "days": "days", "дн": "days", "ден": "days",
+    "w": "weeks", "week": "weeks", "weeks": "weeks", "нед": "weeks",
+    "m": "months", "month": "months", "months": "months", "мес": "months",
+    "y": "years", "year": "years", "years": "years", "год": "years", "лет": "years",
+}
+
+# Наибольшая длина единицы в днях - для проверки длины периода до вычисления дат
+UNIT_MAX_DAYS = {"days": 1, "weeks": 7, "months": 31, "years": 366}
+
+# Границы периода: статистика сравнивает период с предыдущим такой же длины, его даты тоже должны существовать
+MAX_PERIOD_DAYS = 100 * 366
+MIN_PERIOD_DATE = date(1900, 1, 1)
+
+
+def shift_months(day: date, months: int) -> date:
+    """Сдвигает дату на заданное число месяцев (31 января + 1 месяц = последний день февраля)"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    last_day = calendar.monthrange(year, month + 1)[1]
+    return day.replace(year=year, month=month + 1, day=min(day.day, last_day))
+
+
+def _parse_unit(unit: str):
+    unit = unit.lower()
+    if unit in PERIOD_UNITS:
+        return PERIOD_UNITS[unit]
+    for prefix, name in PERIOD_UNITS.items():
+        if len(prefix) > 1 and unit.startswith(prefix):
+            return name
+    return None
+
+
+def _parse_period_bound(text: str):
+    """Разбирает одну границу периода: 2026-09-01, 2026-09 или 2026. Возвращает (начало, конец)"""
+    text = text.strip()
+    for fmt, unit in (("%Y-%m-%d", "day"), ("%Y-%m", "month"), ("%Y", "year")):
+        try:
+            start_date = datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+        if unit == "day":
+            return start_date, start_date
+        if unit == "month":
+            return start_date, shift_months(start_date, 1) - timedelta(days=1)
+        return start_date, start_date.replace(month=12, day=31)
+    raise ValueError(f"❌ Не удалось разобрать дату: {text}")
+
+
+def parse_period(text: str, today: date = None):
+    """Разбирает произвольный период: "2026-09-01..2026-09-30", "2026-09", "2025", "последние 3 месяца", "3m".
+
+    Возвращает (start_date, end_date, period_name)
+    """
+    today = today or clock.today()
+    text = text.strip().lower()
+
+    if ".." in text:
+        start_text, end_text = text.split("..", 1)
+        start_date = _parse_period_bound(start_text)[0]
+        end_date = _parse_period_bound(end_text)[1]
+    else:
+        match = re.fullmatch(r"(?:last|за|последн[а-яё]*)?\s*(\d+)?\s*([a-zа-яё]+)", text)
+        unit = _parse_unit(match.group(2)) if match else None
+        if unit:
+            count = int(match.group(1) or 1)
+            if count <= 0:
+                raise ValueError("❌ Длина периода должна быть больше нуля")
+            if count * UNIT_MAX_DAYS[unit] > MAX_PERIOD_DAYS:
+                raise ValueError("❌ Период слишком длинный: не больше 100 лет")
+            end_date = today
+            if unit == "days":
+                start_date = today - timedelta(days=count - 1)
+            elif unit == "weeks":
+                start_date = today - timedelta(days=count * 7 - 1)
+            elif unit == "months":
+                start_date = shift_months(today, -count) + timedelta(days=1)
+            else:
+                start_date = shift_months(today, -count * 12) + timedelta(days=1)
+        else:
+            start_date, end_date = _parse_period_bound(text)
+
+    if start_date > end_date:
+        raise ValueError("❌ Начало периода позже его конца")
+    if (end_date - start_date).days >= MAX_PERIOD_DAYS:
+        raise ValueError("❌ Период слишком длинный: не больше 100 лет")
+    if start_date < MIN_PERIOD_DATE:
+        raise ValueError(f"❌ Период не может начинаться раньше {MIN_PERIOD_DATE}")
+
+    if start_date == end_date:
+        return start_date, end_date, f"{start_date}"
+    return start_date, end_date, f"({start_date} - {end_date})"
+
+
+def parse_search(text: str, today: date = None):
+    """Разбирает запрос /find: слова для поиска по категории и заметке и необязательные фильтры.
+
+    ">1000" / "<5000" - сумма не меньше / не больше, "2026-09", "2025", "2026-09-01..2026-09-30" - период.
+    Возвращает (words, min_amount, max_amount, start_date, end_date)
+    """
+    words, min_amount, max_amount, start_date, end_date = [], None, None, None, None
+    for token in text.lower().split():
+        if token[0] in "<>" and len(token) > 1:
+            amount = Money.parse(token.lstrip("<>="))
+            if token[0] == ">":
+                min_amount = amount
+            else:
+                max_amount = amount
+        elif re.fullmatch(r"\d{4}(-\d{2}(-\d{2})?)?(\.\.\d{4}(-\d{2}(-\d{2})?)?)?", token):
+            start_date, end_date, _ = parse_period(token, today)
+        else:
+            words.extend(re.findall(r"\w+", token))
+
+    if not words and min_amount is None and max_amount is None and start_date is None:
+        raise ValueError(
+            "❌ Укажите, что искать: /find кофе, /find такси >500, /find продукты 2026-09"
+        )
+    return words, min_amount, max_amount, start_date, end_date
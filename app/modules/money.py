@@ -0,0 +1,131 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from sqlalchemy import BigInteger # type: ignore
+from sqlalchemy.types import TypeDecorator # type: ignore
+
+
+class Money:
+    """Денежная сумма в копейках (центах). Вся арифметика - целочисленная"""
+
+    __slots__ = ("minor",)
+
+    def __init__(self, minor=0):
+        self.minor = int(minor)
+
+    @classmethod
+    def from_decimal(cls, value):
+        """Из рублей (Decimal, строки или числа) с округлением до копейки"""
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError("❌ Сумма должна быть числом")
+        if not value.is_finite():
+            raise ValueError("❌ Сумма должна быть числом")
+        return cls(int((value * 100).to_integral_value(ROUND_HALF_UP)))
+
+    @classmethod
+    def parse(cls, text):
+        """Из пользовательского ввода: "1500", "1 500", "1500.50", "1500,50" """
+        return cls.from_decimal(text.replace(" ", "").replace(",", "."))
+
+    def to_decimal(self):
+        return Decimal(self.minor).scaleb(-2)
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.minor + other.minor)
+        if other == 0:  # Для sum() и накопления с нуля
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.minor - other.minor)
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.minor)
+
+    def __abs__(self):
+        return Money(abs(self.minor))
+
+    def __mul__(self, factor):
+        """Умножение на коэффициент (например, курс валюты) с округлением до копейки"""
+        if isinstance(factor, int):
+            return Money(self.minor * factor)
+        return Money(int((self.minor * Decimal(str(factor))).to_integral_value(ROUND_HALF_UP)))
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.minor == other.minor
+        if other == 0:
+            return self.minor == 0
+        return NotImplemented
+
+    def __lt__(self, other):
+        return self.minor < _minor(other)
+
+    def __le__(self, other):
+        return self.minor <= _minor(other)
+
+    def __gt__(self, other):
+        return self.minor > _minor(other)
+
+    def __ge__(self, other):
+        return self.minor >= _minor(other)
+
+    def __hash__(self):
+        return hash(self.minor)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __int__(self):
+        return self.minor
+
+    def __float__(self):
+        return self.minor / 100
+
+    def __format__(self, spec):
+        return format(self.to_decimal(), spec or ".2f")
+
+    def __str__(self):
+        return format(self, ".2f")
+
+    def __repr__(self):
+        return f"Money({self.minor})"
+
+
+def _minor(value):
+    if isinstance(value, Money):
+        return value.minor
+    if value == 0:
+        return 0
+    raise TypeError(f"Cannot compare Money with {value!r}")
+
+
+class MoneyType(TypeDecorator):
+    """Колонка BIGINT с суммой в копейках. Отдаёт Money, принимает Money или целое число копеек"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, Money):
+            return value.minor
+        if isinstance(value, int):
+            return value
+        raise TypeError(f"Money column expects Money or int minor units, got {value!r}")
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Money(value)
@@ -0,0 +1,212 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+from datetime import datetime
+
+from config import ADMIN_IDS, PROFILE_DEFAULT_UPDATES, PROFILE_DIR, PROFILE_MAX_SECONDS
+from telegram import Update # type: ignore
+from telegram.ext import ContextTypes, TypeHandler # type: ignore
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 15  # Сколько самых затратных функций показывать в ответе
+
+
+class _Suspend:
+    """Передаёт циклу событий то, чего ждёт обёрнутая корутина, и возвращает ей результат"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return (yield self.value)
+
+
+class ProfilingSession:
+    """Профилирование обработчиков на время сессии.
+
+    Обработчики приложения подменяются обёртками только пока сессия активна,
+    после остановки возвращаются исходные - выключенное профилирование ничего не стоит.
+    Профиль включается только на синхронные шаги обработчика между await: пока обработчик ждёт,
+    время других корутин в цикле событий ему не засчитывается
+    """
+
+    def __init__(self, application, chat_id, max_updates):
+        self.application = application
+        self.chat_id = chat_id
+        self.max_updates = max_updates
+        self.updates = 0
+        self.started_at = datetime.now()
+        self.profiles = {}  # имя обработчика -> cProfile.Profile
+        self._originals = []  # (handler, исходный callback)
+        self.job = None
+
+    def install(self):
+        # Только обработчики группы 0: на каждое обновление срабатывает не больше одного из них, поэтому
+        # счётчик обновлений точный. Служебные TypeHandler других групп (/healthz, ограничение частоты)
+        # вызываются для каждого обновления и в профили не попадают
+        for handler in self.application.handlers.get(0, []):
+            callback = getattr(handler, "callback", None)
+            if callback is None or callback is profile_command or isinstance(handler, TypeHandler):
+                continue
+            self._originals.append((handler, callback))
+            handler.callback = self._wrap(callback)
+
+    def uninstall(self):
+        for handler, callback in self._originals:
+            handler.callback = callback
+        self._originals = []
+
+    def _wrap(self, callback):
+        name = callback.__name__
+
+        async def profiled(update, context):
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+            coroutine = callback(update, context)
+            value, error = None, None
+            try:
+                # Корутина обработчика выполняется по шагам; шаги разных корутин не пересекаются,
+                # поэтому включённым бывает только один профиль
+                while True:
+                    profile.enable()
+                    try:
+                        awaited = coroutine.throw(error) if error is not None else coroutine.send(value)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        profile.disable()
+                    try:
+                        value, error = await _Suspend(awaited), None
+                    except BaseException as e:  # В том числе отмена задачи - её получает сам обработчик
+                        value, error = None, e
+            finally:
+                coroutine.close()
+                self.updates += 1
+                if self.updates == self.max_updates:
+                    # Приложение хранит ссылку на задачу до её завершения
+                    self.application.create_task(stop_profiling(self.application))
+
+        return profiled
+
+    def dump(self):
+        """Сохраняет профиль каждого обработчика в отдельный файл. Возвращает список путей"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%d-%H%M%S")
+        paths = []
+        for name, profile in self.profiles.items():
+            path = os.path.join(PROFILE_DIR, f"{stamp}_{name}.prof")
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def format_report(self, paths):
+        """Итог для администратора: время по обработчикам и самые затратные функции"""
+        seconds = (datetime.now() - self.started_at).total_seconds()
+        if not self.profiles:
+            return f"🔬 Профилирование завершено за {seconds:.0f} с: обновлений не было"
+
+        message = f"🔬 Профилирование завершено: {self.updates} обновл. за {seconds:.0f} с\n\n"
+        message += "⏱ По обработчикам:\n"
+        combined = None
+        for name, profile in self.profiles.items():
+            stats = pstats.Stats(profile)
+            message += f"• {name}: {stats.total_tt * 1000:.1f} мс\n"
+            if combined is None:
+                combined = stats
+            else:
+                combined.add(stats)
+
+        # (файл, строка, функция) -> (вызовы, вызовы без рекурсии, собственное время, общее время, вызывающие)
+        top = sorted(combined.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+        message += "\n🔥 Горячие точки (собственное время):\n"
+        for (filename, line, function), (_, calls, own_time, total_time, _) in top:
+            location = f"{os.path.basename(filename)}:{line}" if line else filename
+            message += f"• {own_time * 1000:.1f} мс / {total_time * 1000:.1f} мс, {calls}× {function} ({location})\n"
+
+        message += "\n💾 Профили:\n" + "\n".join(paths)
+        return message[:4000]
+
+
+def start_profiling(application, chat_id, max_updates, seconds):
+    session = ProfilingSession(application, chat_id, max_updates)
+    session.install()
+    session.job = application.job_queue.run_once(profiling_timeout, when=seconds, name="profiling")
+    application.bot_data["profiling"] = session
+    logger.warning("🔬 Profiling enabled by %s: %s updates or %ss", chat_id, max_updates, seconds)
+    return session
+
+
+async def profiling_timeout(context):
+    """Задача JobQueue: остановка профилирования по истечении времени"""
+    await stop_profiling(context.application)
+
+
+async def stop_profiling(application):
+    """Останавливает профилирование, сохраняет профили и отправляет отчёт администратору"""
+    session = application.bot_data.pop("profiling", None)
+    if session is None:
+        return
+    session.uninstall()
+    if session.job is not None:
+        session.job.schedule_removal()
+
+    try:
+        paths = await asyncio.to_thread(session.dump)
+        message = session.format_report(paths)
+    except Exception as e:
+        logger.error("❌ Error saving profiles: %s", e)
+        message = f"❌ Не удалось сохранить профили: {e}"
+    logger.warning("🔬 Profiling finished: %s updates", session.updates)
+    await application.bot.send_message(chat_id=session.chat_id, text=message)
+
+
+def parse_profile_args(args):
+    """"/profile" / "/profile 200" - обновлений, "/profile 30s" - секунд. Возвращает (обновлений, секунд)"""
+    if not args:
+        return PROFILE_DEFAULT_UPDATES, PROFILE_MAX_SECONDS
+    value = args[0].lower()
+    try:
+        if value.endswith("s") or value.endswith("с"):
+            seconds = int(value[:-1])
+            if seconds <= 0:
+                raise ValueError
+            return None, min(seconds, PROFILE_MAX_SECONDS)
+        updates = int(value)
+        if updates <= 0:
+            raise ValueError
+        return updates, PROFILE_MAX_SECONDS
+    except ValueError:
+        raise ValueError(
+            "❌ Формат: /profile [N | Ts | stop]\n"
+            "Например: /profile 200 - следующие 200 обновлений, /profile 30s - следующие 30 секунд"
+        )
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /profile: включить профилирование обработки обновлений (только для администраторов)"""
+    chat_id = update.effective_chat.id
+    if chat_id not in ADMIN_IDS:
+        return
+
+    if context.args and context.args[0].lower() == "stop":
+        if "profiling" not in context.bot_data:
+            await update.message.reply_text("ℹ️ Профилирование не запущено")
+            return
+        await stop_profiling(context.application)
+        return
+
+    if "profiling" in context.bot_data:
+        await update.message.reply_text("ℹ️ Профилирование уже идёт. Остановить: /profile stop")
+        return
+
+    try:
+        max_updates, seconds = parse_profile_args(context.args)
+    except ValueError as e:
+        await update.message.reply_text(str(e))
+        return
+
+    start_profiling(context.application, chat_id, max_updates, seconds)
+    limit = f"{max_updates} обновл. или {seconds} с" if max_updates else f"{seconds} с"
+    await update.message.reply_text(f"🔬 Профилирование включено: {limit}. Отчёт придёт сюда")
@@ -0,0 +1,100 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from config import RATE_LIMIT_BURST, RATE_LIMIT_MAX_CHATS, RATE_LIMIT_PER_MEMBER, RATE_LIMIT_RATE
+from modules.health import health_monitor
+from telegram import Update # type: ignore
+from telegram.ext import ApplicationHandlerStop, ContextTypes # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketLimiter:
+    """Token bucket на каждый чат: burst сообщений подряд, дальше rate сообщений в секунду.
+
+    Корзины хранятся в порядке последнего обращения. Корзина, не использовавшаяся дольше времени полного
+    наполнения, ничем не отличается от новой и удаляется; сверх max_chats удаляются самые давние
+    """
+
+    def __init__(self, rate, burst, max_chats, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_chats = max_chats
+        self.clock = clock
+        self.idle_seconds = burst / rate
+        self._buckets = OrderedDict()  # chat_id -> [токены, время обновления, отправлено ли предупреждение]
+
+    def acquire(self, chat_id):
+        """Списывает токен. Возвращает (разрешено ли, нужно ли отправить предупреждение, секунд до токена)"""
+        now = self.clock()
+        bucket = self._buckets.pop(chat_id, None)
+        if bucket is None:
+            bucket = [float(self.burst), now, False]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self._buckets[chat_id] = bucket
+        self._evict(now)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            bucket[2] = False
+            return True, False, 0
+
+        notify = not bucket[2]
+        bucket[2] = True
+        return False, notify, (1 - bucket[0]) / self.rate
+
+    def _evict(self, now):
+        while self._buckets:
+            chat_id, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.idle_seconds and len(self._buckets) <= self.max_chats:
+                break
+            del self._buckets[chat_id]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+limiter = TokenBucketLimiter(RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CHATS) if RATE_LIMIT_RATE > 0 else None
+
+
+async def rate_limit_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Группа -1: сообщения и нажатия кнопок сверх лимита не доходят до обработчиков.
+
+    Кнопки истории и поиска на каждое нажатие выполняют запрос к БД, поэтому расходуют ту же корзину,
+    что и сообщения. Об ограничении чат узнаёт одним предупреждением, остальное отбрасывается молча
+    """
+    query = update.callback_query
+    if limiter is None or not update.effective_chat:
+        return
+    if query is None and not (update.message and update.message.text):
+        return
+
+    chat_id = update.effective_chat.id
+    # Лимит общий на чат. С RATE_LIMIT_PER_MEMBER в группе у каждого участника своя корзина - тогда
+    # группа из N участников может отправить в N раз больше
+    key = chat_id
+    if RATE_LIMIT_PER_MEMBER and update.effective_chat.type != "private" and update.effective_user:
+        key = (chat_id, update.effective_user.id)
+    allowed, notify, retry_after = limiter.acquire(key)
+    if allowed:
+        return
+
+    if notify:
+        logger.warning("⚠️ Chat %s is rate limited", chat_id, extra={"event": "rate_limited"})
+        text = (
+            f"⏳ Слишком много сообщений. Подождите {math.ceil(retry_after)} с - "
+            f"сообщения и нажатия кнопок до этого не будут обработаны"
+        )
+        if query is not None:
+            await query.answer(text, show_alert=True)
+        else:
+            await update.message.reply_text(text)
+    elif query is not None:
+        await query.answer()  # Без ответа кнопка продолжает показывать загрузку
+    # Последняя группа обработчиков не выполнится - отмечаем обновление обработанным здесь
+    health_monitor.update_finished()
+    raise ApplicationHandlerStop
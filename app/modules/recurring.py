@@ -0,0 +1,15 @@
+import asyncio
+import logging
+
+from modules import clock
+from modules.database import materialize_recurring_transactions
+
+logger = logging.getLogger(__name__)
+
+
+async def create_recurring_transactions(context):
+    """Задача JobQueue: добавить все наступившие регулярные операции, включая пропущенные за время простоя"""
+    try:
+        await asyncio.to_thread(materialize_recurring_transactions, clock.today())
+    except Exception as e:
+        logger.error("❌ Error creating recurring transactions: %s", e)
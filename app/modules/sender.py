@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+from config import SEND_QUEUE_SIZE, SEND_RATE
+from telegram.error import Forbidden, RetryAfter # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedSender:
+    """Очередь исходящих сообщений с ограничением скорости отправки"""
+
+    def __init__(self, rate, max_queue):
+        self.interval = 1 / rate
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+
+    def start(self, bot):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker(bot))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def pending(self):
+        """Сколько сообщений ждёт отправки"""
+        return self.queue.qsize()
+
+    async def send(self, chat_id, text):
+        """Поставить сообщение в очередь. Ждёт, если очередь заполнена"""
+        await self.queue.put((chat_id, text))
+
+    async def _worker(self, bot):
+        while True:
+            chat_id, text = await self.queue.get()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+            except RetryAfter as e:
+                # Telegram попросил подождать - ждём и повторяем один раз
+                await asyncio.sleep(e.retry_after)
+                try:
+                    await bot.send_message(chat_id=chat_id, text=text)
+                except Exception as e:
+                    logger.error("❌ Error sending message to %s: %s", chat_id, e)
+            except Forbidden:
+                logger.warning("⚠️ Chat %s blocked the bot, message dropped", chat_id)
+            except Exception as e:
+                logger.error("❌ Error sending message to %s: %s", chat_id, e)
+            finally:
+                self.queue.task_done()
+            await asyncio.sleep(self.interval)
+
+
+sender = RateLimitedSender(SEND_RATE, SEND_QUEUE_SIZE)
+
+
+async def start_sender(application):
+    sender.start(application.bot)
+
+
+async def stop_sender(application):
+    await sender.stop()
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import logging
+import signal
+
+from config import (
+    QUEUE_BATCH_SIZE,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_POLL_INTERVAL,
+    QUEUE_SHARDS,
+)
+from modules.database import claim_updates, delete_updates, enqueue_update
+from telegram import Update # type: ignore
+from telegram.ext import ContextTypes # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def get_shard(chat_id):
+    """Шард чата: все обновления одного чата попадают к одному воркеру и обрабатываются по порядку"""
+    return chat_id % QUEUE_SHARDS
+
+
+def get_worker_shards(worker_index, worker_count):
+    return [shard for shard in range(QUEUE_SHARDS) if shard % worker_count == worker_index]
+
+
+''' Ingress: приём обновлений в очередь '''
+
+async def enqueue_incoming_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Единственный обработчик ingress: сохраняет сырое обновление в очередь без обработки"""
+    chat_id = update.effective_chat.id if update.effective_chat else 0
+    await asyncio.to_thread(enqueue_update, get_shard(chat_id), chat_id, update.to_json())
+
+
+''' Worker: обработка своих шардов очереди '''
+
+async def run_worker(application, worker_index, worker_count, post_init=None, post_shutdown=None):
+    """Забирает обновления своих шардов и прогоняет их через обычные обработчики приложения"""
+    shards = get_worker_shards(worker_index, worker_count)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop_event.set)
+
+    await application.initialize()
+    if post_init:
+        await post_init(application)
+    await application.start()
+    logger.info("✅ Worker %s/%s started: %s shards", worker_index, worker_count, len(shards))
+
+    try:
+        while not stop_event.is_set():
+            rows = await asyncio.to_thread(claim_updates, shards, QUEUE_BATCH_SIZE, QUEUE_LEASE_SECONDS)
+            if not rows:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=QUEUE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Обновления обрабатываются строго по очереди - порядок сообщений каждого чата сохраняется.
+            # Каждое удаляется из очереди сразу после обработки: обработчики не идемпотентны, и после падения
+            # воркера посреди пачки уже обработанные обновления не должны выполниться ещё раз
+            for row in rows:
+                if stop_event.is_set():
+                    break  # Остаток пачки вернётся в очередь, когда истечёт аренда
+                try:
+                    update = Update.de_json(json.loads(row.payload), application.bot)
+                    await application.process_update(update)
+                except Exception as e:
+                    logger.error("❌ Error processing queued update %s for chat %s: %s", row.id, row.chat_id, e)
+                await asyncio.to_thread(delete_updates, [row.id])
+    finally:
+        await application.stop()
+        if post_shutdown:
+            await post_shutdown(application)
+        await application.shutdown()
+        logger.info("✅ Worker %s/%s stopped", worker_index, worker_count)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from config import WIPE_BATCH_PAUSE, WIPE_BATCH_SIZE, WIPE_PROGRESS_INTERVAL, WIPE_RETRIES, WIPE_RETRY_DELAY
+from modules.database import delete_wipe_batch, get_wipe_jobs
+
+logger = logging.getLogger(__name__)
+
+_running = set()  # chat_id, удаление которых выполняется в этом процессе
+
+
+def format_wipe_progress(deleted, total):
+    percent = deleted * 100 // total if total else 100
+    return f"🗑️ Удаление операций: {deleted} из {total} ({percent}%)"
+
+
+async def delete_batch(chat_id):
+    """Следующая пачка удаления; после временной ошибки БД пачка повторяется с удваивающейся паузой"""
+    for attempt in range(WIPE_RETRIES + 1):
+        try:
+            return await asyncio.to_thread(delete_wipe_batch, chat_id, WIPE_BATCH_SIZE)
+        except OperationalError as e:
+            if attempt == WIPE_RETRIES:
+                raise
+            delay = WIPE_RETRY_DELAY * 2 ** attempt
+            logger.warning("⚠️ Wipe batch for %s failed, retrying in %gs: %s", chat_id, delay, e)
+            await asyncio.sleep(delay)
+
+
+async def run_wipe_job(bot, chat_id, message_id):
+    """Удаляет операции пользователя пачками, между пачками отдаёт управление другим обработчикам.
+
+    Прогресс показывается правкой сообщения message_id (не чаще WIPE_PROGRESS_INTERVAL)
+    """
+    if chat_id in _running:
+        return
+    _running.add(chat_id)
+    try:
+        last_progress = time.monotonic()
+        while True:
+            batch = await delete_batch(chat_id)
+            if batch is None:
+                return  # Удаление уже завершил другой процесс и сам отправил итог
+            deleted, total, done = batch
+            if done:
+                break
+            if message_id and time.monotonic() - last_progress >= WIPE_PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                try:
+                    await bot.edit_message_text(format_wipe_progress(deleted, total), chat_id=chat_id, message_id=message_id)
+                except Exception as e:
+                    logger.warning("⚠️ Can't update wipe progress for %s: %s", chat_id, e)
+            await asyncio.sleep(WIPE_BATCH_PAUSE)
+
+        text = f"✅ Все данные удалены (операций: {deleted}). Бот готов к работе с чистого листа!"
+        if message_id:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+        else:
+            await bot.send_message(chat_id=chat_id, text=text)
+    except Exception as e:
+        # Задание остаётся в БД - его подхватит следующий запуск resume_wipe_jobs
+        logger.error("❌ Error wiping data for user %s: %s", chat_id, e)
+    finally:
+        _running.discard(chat_id)
+
+
+async def resume_wipe_jobs(context):
+    """Периодическая задача JobQueue: продолжить удаления, прерванные перезапуском или ошибкой БД.
+
+    Пачки удаления берут блокировку задания, поэтому удаление, идущее в другом процессе, не испортится,
+    если его подхватят ещё раз"""
+    try:
+        jobs = await asyncio.to_thread(get_wipe_jobs)
+    except Exception as e:
+        logger.error("❌ Error loading wipe jobs: %s", e)
+        return
+
+    for job in jobs:
+        if job.chat_id in _running:
+            continue
+        logger.info("✅ Resuming data wipe for %s: %s/%s", job.chat_id, job.deleted, job.total)
+        context.application.create_task(run_wipe_job(context.bot, job.chat_id, job.message_id))
@@ -0,0 +1,161 @@
+"""Сравнение /analytics на NumPy с расчётом по строкам.
+
+Синтетическая история расходов одного чата записывается в базу, после чего оба варианта считают одни
+и те же метрики (скользящее среднее, необычные дни, категории к прошлому месяцу, прогноз):
+- NumPy: колонки целых чисел одним запросом (get_expense_columns) и compute_analytics;
+- по строкам: (дата, категория, Money) из get_chart_data и циклы Python по дням и категориям.
+Результаты сверяются, затем печатается время запроса и расчёта. Дополнительно расчёт без базы
+на истории в COMPUTE_YEARS лет и COMPUTE_CATEGORIES категорий.
+
+По умолчанию - временная база SQLite, сервисы не нужны:
+    python benchmarks/analytics_numpy.py
+На PostgreSQL (чат создаётся и не удаляется):
+    DB_BACKEND=postgres DATABASE_URL=postgresql://... python benchmarks/analytics_numpy.py
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+if "DB_BACKEND" not in os.environ:
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="hom-bench-"), "hom.db")
+
+from config import ANALYTICS_WINDOW, ANALYTICS_Z_THRESHOLD  # noqa: E402
+from modules import clock  # noqa: E402
+from modules import database as db  # noqa: E402
+from modules.analytics import TOP_CATEGORIES, TOP_OUTLIERS, compute_analytics  # noqa: E402
+from modules.message_parser import shift_months  # noqa: E402
+from modules.money import Money  # noqa: E402
+
+YEARS = int(os.getenv("YEARS", "5"))
+CATEGORIES = int(os.getenv("CATEGORIES", "12"))
+OPERATIONS_PER_DAY = float(os.getenv("OPERATIONS_PER_DAY", "6"))
+COMPUTE_YEARS = int(os.getenv("COMPUTE_YEARS", "10"))
+COMPUTE_CATEGORIES = int(os.getenv("COMPUTE_CATEGORIES", "30"))
+REPEATS = int(os.getenv("REPEATS", "20"))
+
+
+def compute_per_row(rows, today, window=ANALYTICS_WINDOW, z_threshold=ANALYTICS_Z_THRESHOLD):
+    """Те же метрики, что compute_analytics, по строкам (дата, категория, Money) без NumPy"""
+    month_start = today.replace(day=1)
+    prev_start = shift_months(month_start, -1)
+    prev_end = shift_months(today, -1)
+
+    by_day = defaultdict(int)
+    current = defaultdict(int)
+    previous = defaultdict(int)
+    for day, category, amount in rows:
+        by_day[day] += amount.minor
+        if day >= month_start:
+            current[category] += amount.minor
+        elif prev_start <= day <= prev_end:
+            previous[category] += amount.minor
+
+    start_date = min(by_day)
+    daily = [by_day.get(start_date + timedelta(days=i), 0) for i in range((today - start_date).days + 1)]
+    moving_average = [sum(daily[i - window + 1:i + 1]) / window for i in range(window - 1, len(daily))]
+
+    mean = sum(daily) / len(daily)
+    std = math.sqrt(sum((value - mean) ** 2 for value in daily) / len(daily))
+    outliers = []
+    if std > 0:
+        scored = [(i, (value - mean) / std) for i, value in enumerate(daily)]
+        scored = sorted((item for item in scored if item[1] >= z_threshold), key=lambda item: item[1], reverse=True)
+        outliers = [(start_date + timedelta(days=i), daily[i], z) for i, z in scored[:TOP_OUTLIERS]]
+
+    names = set(current) | set(previous)
+    categories = sorted(
+        ((name, current[name], previous[name]) for name in names), key=lambda c: (c[1], c[2], c[0]), reverse=True
+    )[:TOP_CATEGORIES]
+
+    month_spent = sum(daily[max(0, (month_start - start_date).days):])
+    return moving_average, outliers, categories, month_spent, month_spent / today.day
+
+
+def check_same(analytics, per_row):
+    moving_average, outliers, categories, month_spent, forecast = per_row
+    assert len(moving_average) == len(analytics.moving_average)
+    assert all(math.isclose(a, b, abs_tol=1e-6) for a, b in zip(moving_average, analytics.moving_average))
+    assert [day for day, _, _ in outliers] == [day for day, _, _ in analytics.outliers]
+    assert categories == analytics.categories
+    assert month_spent == analytics.month_spent
+    assert math.isclose(forecast * analytics.days_in_month, analytics.forecast)
+
+
+def best_ms(function, *args):
+    best = math.inf
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def synthetic_rows(rng, today, years, categories):
+    """Расходы по (день, категория): как их возвращает группировка get_chart_data"""
+    start_date = today - timedelta(days=365 * years)
+    names = [f"категория {i:02d}" for i in range(categories)]
+    rows = []
+    for offset in range((today - start_date).days + 1):
+        day = start_date + timedelta(days=offset)
+        for name in rng.sample(names, min(categories, max(1, round(rng.expovariate(1 / OPERATIONS_PER_DAY))))):
+            rows.append((day, name, Money(rng.randint(5000, 300000) * (20 if rng.random() < 0.002 else 1))))
+    return rows
+
+
+def to_columns(rows):
+    names = sorted({category for _, category, _ in rows})
+    codes = {name: code for code, name in enumerate(names)}
+    epoch = datetime(1970, 1, 1).date()
+    return (
+        [(day - epoch).days for day, _, _ in rows],
+        [codes[category] for _, category, _ in rows],
+        [amount.minor for _, _, amount in rows],
+        names,
+    )
+
+
+def main():
+    rng = random.Random(47)
+    today = clock.today()
+    start_date = today - timedelta(days=365 * YEARS)
+    chat_id = rng.randint(10**12, 10**13)
+
+    rows = synthetic_rows(rng, today, YEARS, CATEGORIES)
+    session = db.Session()
+    session.execute(
+        db.insert(db.Transaction),
+        [{"chat_id": chat_id, "date": day, "category": category, "amount": amount, "type": "expense"}
+         for day, category, amount in rows],
+    )
+    session.commit()
+    session.close()
+    print(f"{db.DATABASE_URL.split(':')[0]}: {len(rows)} операций за {YEARS} лет, {CATEGORIES} категорий")
+
+    fetch_columns_ms, columns = best_ms(db.get_expense_columns, chat_id, start_date, today)
+    fetch_rows_ms, chart_rows = best_ms(db.get_chart_data, chat_id, start_date, today)
+    chart_rows = [(row.date, row.category, row.amount) for row in chart_rows]
+    numpy_ms, analytics = best_ms(compute_analytics, *columns, today)
+    per_row_ms, per_row = best_ms(compute_per_row, chart_rows, today)
+    check_same(analytics, per_row)
+    print(f"  NumPy:       запрос {fetch_columns_ms:7.1f} мс, расчёт {numpy_ms:7.1f} мс")
+    print(f"  по строкам:  запрос {fetch_rows_ms:7.1f} мс, расчёт {per_row_ms:7.1f} мс")
+
+    rows = synthetic_rows(rng, today, COMPUTE_YEARS, COMPUTE_CATEGORIES)
+    columns = to_columns(rows)
+    numpy_ms, analytics = best_ms(compute_analytics, *columns, today)
+    per_row_ms, per_row = best_ms(compute_per_row, rows, today)
+    check_same(analytics, per_row)
+    print(f"Без базы: {len(rows)} пар (день, категория) за {COMPUTE_YEARS} лет, {COMPUTE_CATEGORIES} категорий")
+    print(f"  NumPy:       расчёт {numpy_ms:7.1f} мс")
+    print(f"  по строкам:  расчёт {per_row_ms:7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Нагрузочный тест баланса группового чата: общая строка user_balances против долей участников.
+
+WRITERS потоков одновременно пишут операции в один групповой чат. В режиме shared все изменения идут
+в одну строку баланса и ждут друг друга на её блокировке, в режиме members - в строку своего участника.
+COMMIT_DELAY_MS добавляется перед каждым COMMIT и моделирует сетевую задержку до базы: блокировка
+строки держится до конца транзакции, поэтому именно задержка и определяет очередь на общей строке.
+
+Каждый режим запускается RUNS раз поочерёдно, итог - медиана (на нагруженной машине отдельные прогоны
+заметно расходятся). Запуск из корня репозитория на тестовой базе (чаты создаются и не удаляются):
+    DB_BACKEND=postgres DATABASE_URL=postgresql://... python benchmarks/member_balance_load.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+
+from modules import clock  # noqa: E402
+from modules import database as db  # noqa: E402
+from modules.money import Money  # noqa: E402
+
+WRITERS = int(os.getenv("WRITERS", "40"))
+WRITES = int(os.getenv("WRITES", "1000"))
+COMMIT_DELAY_MS = float(os.getenv("COMMIT_DELAY_MS", "5"))
+RUNS = int(os.getenv("RUNS", "5"))
+
+
+def run(mode):
+    chat_id = -random.randint(10**12, 10**13)  # Отрицательный id, как у групп Telegram
+    today = clock.today()
+    amounts = [Money(random.randint(1, 10000)) for _ in range(WRITES)]
+
+    def write(number):
+        # В режиме shared автор не указывается - изменение идёт в общую строку, как у личного чата
+        user_id = number % WRITERS + 1 if mode == "members" else None
+        db.add_transaction(chat_id, today, "нагрузка", amounts[number], False, user_id=user_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(WRITERS) as pool:
+        list(pool.map(write, range(WRITES)))
+    elapsed = time.perf_counter() - started
+
+    expected = -sum(amounts, Money(0))
+    balance = db.get_user_balance(chat_id)
+    if balance != expected:
+        raise AssertionError(f"{mode}: баланс {balance}, ожидался {expected}")
+    return WRITES / elapsed
+
+
+def main():
+    # Отдельный пул на всех писателей, иначе потоки ждут соединения, а не блокировки строки
+    bench_engine = create_engine(db.engine.url, pool_size=WRITERS, max_overflow=0)
+
+    @event.listens_for(bench_engine, "commit")
+    def delay_commit(conn):
+        time.sleep(COMMIT_DELAY_MS / 1000)
+
+    db.Session.configure(bind=bench_engine)
+    print(f"{WRITERS} писателей, {WRITES} записей, задержка перед COMMIT {COMMIT_DELAY_MS} мс, прогонов {RUNS}")
+    results = {"shared": [], "members": []}
+    for _ in range(RUNS):
+        for mode, rates in results.items():
+            rates.append(run(mode))
+    for mode, rates in results.items():
+        runs = ", ".join(f"{rate:.0f}" for rate in rates)
+        print(f"{mode:>8}: медиана {statistics.median(rates):4.0f} записей/с ({runs}), баланс сходится")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import itertools
+import os
+import random
+import sys
+import tempfile
+
+import pytest
+
+# Модули бота импортируются так же, как в контейнере: из каталога app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+# База выбирается до импорта modules.database: TEST_DATABASE_URL - PostgreSQL, иначе временный файл SQLite
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DB_BACKEND"] = "postgres"
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="hom-tests-"), "hom.db")
+
+# В базе PostgreSQL могут остаться данные прошлых запусков - у каждого теста свои chat_id
+_chat_ids = itertools.count(random.randint(10**6, 10**7) * 10**6)
+
+
+@pytest.fixture
+def chat_id():
+    return next(_chat_ids)
+
+
+@pytest.fixture
+def make_chat_id():
+    """Для тестов, которым нужно несколько чатов"""
+    return lambda: next(_chat_ids)
+
+
+@pytest.fixture
+def currency(chat_id):
+    """Код валюты, уникальный для теста: курсы в общей базе хранятся не по чатам"""
+    return f"T{chat_id}"
+
+
+@pytest.fixture
+def today():
+    from modules import clock
+
+    return clock.today()
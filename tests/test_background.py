@@ -0,0 +1,101 @@
+import random
+from datetime import date, datetime, timedelta
+
+from modules import database as db
+from modules.admin import format_growth
+from modules.money import Money
+
+
+def test_update_queue_claims_in_order(chat_id):
+    # Свои шарды: в общей базе очередь могут использовать другие запуски
+    shards = random.sample(range(10**6, 10**7), 2)
+    for number in range(5):
+        db.enqueue_update(shards[number % 2], chat_id, f'{{"n": {number}}}')
+
+    claimed = db.claim_updates([shards[0]], 10, 60)
+    assert [row.payload for row in claimed] == ['{"n": 0}', '{"n": 2}', '{"n": 4}']
+    # Взятые обновления арендованы и не выдаются повторно
+    assert db.claim_updates([shards[0]], 10, 60) == []
+
+    db.delete_updates([row.id for row in claimed])
+    assert len(db.claim_updates(shards, 10, 60)) == 2
+
+
+def test_digest_batches(chat_id, make_chat_id, today):
+    other_chat_id = make_chat_id()
+    db.set_digest_subscription(chat_id, "day", True)
+    db.set_digest_subscription(other_chat_id, "day", True)
+    db.set_digest_subscription(other_chat_id, "day", False)
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.add_transaction(chat_id, today, "зп", Money(2000), True)
+
+    assert db.get_digest_subscriptions(chat_id) == ["day"]
+    rows = [row for batch in db.iter_digest_batches("day", today, today, 10) for row in batch]
+    row = next(row for row in rows if row.chat_id == chat_id)
+    assert (row.income, row.expenses, row.operations, row.balance) == (Money(2000), Money(500), 2, Money(1500))
+    assert all(row.chat_id != other_chat_id for row in rows)
+
+
+def test_digest_batches_by_key(make_chat_id, today):
+    chat_ids = [make_chat_id() for _ in range(5)]
+    for chat_id in chat_ids:
+        db.set_digest_subscription(chat_id, "week", True)
+
+    batches = list(db.iter_digest_batches("week", today, today, 2))
+    assert all(len(batch) <= 2 for batch in batches)
+    # Порции идут подряд по chat_id без пропусков и повторов
+    sent = [row.chat_id for batch in batches for row in batch]
+    assert sent == sorted(set(sent))
+    assert set(chat_ids) <= set(sent)
+
+
+def test_exchange_rates_latest_on_date(currency, today):
+    db.save_exchange_rates(today, {currency: 81.5})
+    db.save_exchange_rates(today, {currency: 82.25})
+    assert float(db.get_exchange_rates(today)[currency]) == 82.25
+
+
+def test_admin_stats(chat_id, today):
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.refresh_admin_views()
+    db.refresh_admin_views()
+
+    stats = db.get_admin_stats()
+    assert stats.transactions_rows > 0
+    assert stats.database_size > 0
+    assert stats.transactions_size > 0
+    assert any(day == today for day, _, _ in stats.daily)
+    assert isinstance(stats.hourly[0][0], datetime)
+    # Замер размера за день один, повторный пересчёт его перезаписывает
+    assert len([day for day, _ in stats.size_history if day == stats.size_history[0][0]]) == 1
+    assert stats.size_history[0][1] == stats.database_size
+
+
+def test_database_growth_format():
+    day = date(2026, 10, 19)
+    mb = 1024 * 1024
+    history = [(day, 50 * mb), (day - timedelta(days=1), 49 * mb), (day - timedelta(days=6), 40 * mb)]
+    # Замера недельной давности нет - неделя считается от самого старого замера в её пределах
+    assert format_growth(history) == "📈 Рост базы: +1 МБ за 1 дн., +10 МБ за 6 дн."
+    assert format_growth([(day, 40 * mb), (day - timedelta(days=20), 41 * mb)]) == "📈 Рост базы: -1 МБ за 20 дн."
+    assert format_growth(history[:1]) == "📈 Рост базы: замеров пока недостаточно"
+
+
+def test_user_data_wipe(chat_id, today):
+    for _ in range(5):
+        db.add_transaction(chat_id, today, "кино", Money(100), False)
+    db.set_budget(chat_id, "кино", Money(1000), today.replace(day=1))
+
+    job, created = db.start_user_data_wipe(chat_id)
+    assert created and job.total == 5
+    # Повторный запуск возвращает то же задание
+    assert db.start_user_data_wipe(chat_id)[1] is False
+
+    finished = False
+    while not finished:
+        deleted, total, finished = db.delete_wipe_batch(chat_id, 2)
+    assert (deleted, total) == (5, 5)
+    assert db.count_transactions(chat_id) == 0
+    assert db.get_user_balance(chat_id) == Money(0)
+    assert db.get_budgets(chat_id, today.replace(day=1)) == []
+    assert all(job.chat_id != chat_id for job in db.get_wipe_jobs())
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import timedelta
+
+from modules import balance_history, clock
+from modules import database as db
+from modules.money import Money
+
+
+def test_balance_on_date_from_snapshots(chat_id, today):
+    yesterday = today - timedelta(days=1)
+    db.add_transaction(chat_id, today - timedelta(days=3), "зарплата", Money(100000), True)
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+
+    db.snapshot_balances(yesterday)
+    # Повторный запуск за тот же день ничего не добавляет
+    assert db.snapshot_balances(yesterday) == 0
+
+    assert db.get_balance_on(chat_id, yesterday) == Money(100000)
+    assert db.get_balance_on(chat_id, today - timedelta(days=10)) == Money(0)
+    assert db.get_balance_on(chat_id, today) == Money(99500)
+    series = db.get_balance_series(chat_id, today - timedelta(days=4), today)
+    assert [balance for _, balance in series] == [Money(0), Money(100000), Money(100000), Money(100000), Money(99500)]
+
+
+def test_reset_keeps_history(chat_id, today):
+    yesterday = today - timedelta(days=1)
+    db.add_transaction(chat_id, yesterday, "зарплата", Money(1000), True)
+    db.snapshot_balances(yesterday)
+    db.reset_user_balance(chat_id, Money(777))
+
+    assert db.get_user_balance(chat_id) == Money(777)
+    assert db.get_balance_on(chat_id, yesterday) == Money(1000)
+    assert db.get_balance_on(chat_id, today) == Money(777)
+
+
+def test_snapshot_of_group_chat_includes_members(chat_id, today):
+    yesterday = today - timedelta(days=1)
+    db.add_transaction(chat_id, yesterday, "еда", Money(400), False, user_id=1)
+    db.snapshot_balances(yesterday)
+    db.add_transaction(chat_id, today, "еда", Money(100), False, user_id=2)
+
+    assert db.get_balance_on(chat_id, yesterday) == Money(-400)
+    assert db.get_user_balance(chat_id) == Money(-500)
+
+
+def test_changed_history_invalidates_day_snapshots(chat_id, today):
+    yesterday = today - timedelta(days=1)
+    db.add_transaction(chat_id, today - timedelta(days=9), "еда", Money(1000), False)
+    transaction = db.get_transactions(chat_id)[0]
+    db.snapshot_balances(yesterday)
+    assert db.get_balance_on(chat_id, yesterday) == Money(-1000)
+
+    db.update_transaction_amount(chat_id, transaction.id, Money(400))
+    assert db.get_balance_on(chat_id, yesterday) == Money(-400)
+
+    db.snapshot_balances(yesterday)
+    db.delete_transaction(chat_id, transaction.id)
+    assert db.get_balance_on(chat_id, yesterday) == Money(0)
+    assert db.get_balance_on(chat_id, today - timedelta(days=10)) == Money(0)
+    assert db.get_user_balance(chat_id) == Money(0)
+
+    db.snapshot_balances(yesterday)
+    db.add_transaction(chat_id, today - timedelta(days=5), "кафе", Money(300), False)
+    assert db.get_balance_on(chat_id, yesterday) == Money(-300)
+
+
+def test_backdated_recurring_invalidates_day_snapshots(chat_id, today):
+    yesterday = today - timedelta(days=1)
+    db.add_transaction(chat_id, today - timedelta(days=3), "зп", Money(1000), True)
+    db.snapshot_balances(yesterday)
+    db.add_recurring_transaction(chat_id, "кофе", Money(100), False, "day", today - timedelta(days=2))
+    db.materialize_recurring_transactions(today)
+
+    assert db.get_balance_on(chat_id, yesterday) == Money(800)
+    assert db.get_user_balance(chat_id) == Money(700)
+
+
+def test_job_snapshots_yesterday_in_timezone(today, monkeypatch):
+    days = []
+    monkeypatch.setattr(balance_history, "snapshot_balances", lambda day: days.append(day) or 0)
+    # В TIMEZONE уже наступило завтра: конец дня - сегодняшний, а не вчерашний по часам сервера
+    monkeypatch.setattr(clock, "today", lambda: today + timedelta(days=1))
+    asyncio.run(balance_history.save_balance_snapshots(None))
+    assert days == [today]
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from modules import database as db
+from modules import exchange_rates
+from modules.exchange_rates import FileRateProvider, HttpRateProvider, RateProvider, get_rates
+
+
+def test_rate_provider_requires_fetch():
+    with pytest.raises(TypeError):
+        RateProvider()
+
+
+def test_file_provider(tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"date": "2026-10-19", "rates": {"USD": 81.5, "CNY": 11.4}}), encoding="utf-8")
+
+    assert FileRateProvider(str(path)).fetch() == (
+        date(2026, 10, 19), {"USD": Decimal("81.5"), "CNY": Decimal("11.4")}
+    )
+
+
+@pytest.fixture
+def rates_server():
+    """Локальный HTTP-сервер с ответом в формате ЦБ РФ"""
+    body = json.dumps({
+        "Date": "2026-10-19T11:30:00+03:00",
+        "Valute": {
+            "USD": {"Nominal": 1, "Value": 81.5},
+            "JPY": {"Nominal": 100, "Value": 54.2},
+        },
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/daily_json.js"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_provider(rates_server):
+    rates_date, rates = HttpRateProvider(rates_server).fetch()
+    assert rates_date == date(2026, 10, 19)
+    # Курс за Nominal единиц делится на номинал
+    assert rates == {"USD": Decimal("81.5"), "JPY": Decimal("0.542")}
+
+
+def test_refresh_updates_cached_rates(currency, today, tmp_path, monkeypatch):
+    yesterday = today - timedelta(days=1)
+    db.save_exchange_rates(yesterday, {currency: Decimal("80")})
+    assert get_rates(today)[currency] == Decimal("80")
+    assert get_rates(yesterday)[currency] == Decimal("80")
+
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"date": str(today), "rates": {currency: 90}}), encoding="utf-8")
+    monkeypatch.setattr(exchange_rates, "get_rate_provider", lambda: FileRateProvider(str(path)))
+    asyncio.run(exchange_rates.refresh_exchange_rates(None))
+
+    # Курсы на сегодня уже в кэше и новые, на прошлые даты - прежние
+    assert exchange_rates.rate_cache._items[today][1][currency] == Decimal("90")
+    assert get_rates(today)[currency] == Decimal("90")
+    assert get_rates(yesterday)[currency] == Decimal("80")
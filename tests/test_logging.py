@@ -0,0 +1,19 @@
+import logging
+import queue
+
+from modules.logging_setup import _DeferredQueueHandler
+
+
+def test_queued_record_keeps_message_at_call_time():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("test_queued_record")
+    logger.propagate = False
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+
+    rows = ["кино"]
+    logger.warning("⚠️ Rows: %s", rows)
+    rows.append("кафе")  # Объект из args меняется до того, как поток вывода возьмёт запись
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "⚠️ Rows: ['кино']"
+    assert record.args is None
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from modules import database as db
+from modules import handlers
+from modules.exchange_rates import get_rates
+from modules.money import Money
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None):
+        self.replies.append(text)
+
+
+@pytest.mark.parametrize(
+    "screen",
+    [
+        handlers.show_main_menu,
+        handlers.show_settings_menu,
+        handlers.show_balance_menu,
+        handlers.start_set_balance,
+        handlers.start_reset_balance,
+        handlers.cancel_operation,
+        handlers.show_currencies_menu,
+        handlers.show_delete_currency_menu,
+    ],
+)
+def test_menu_screen_is_one_query(screen, chat_id, today):
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.create_currency_balance(chat_id, "USD")
+    get_rates()  # Курсы берутся из кэша процесса, а не при каждом показе меню
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {db.engine, db.replica_engine or db.engine}
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    try:
+        message = FakeMessage()
+        update = SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id), message=message)
+        asyncio.run(screen(update, SimpleNamespace(user_data={})))
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+
+    assert len(message.replies) == 1
+    # Один запрос снимка; BEGIN/проверки соединения SQLite сюда не попадают
+    queries = [s for s in statements if not s.lstrip().upper().startswith(("BEGIN", "SELECT 1"))]
+    assert len(queries) == 1 and "transactions_count" in queries[0]
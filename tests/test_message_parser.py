@@ -0,0 +1,58 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from modules import clock
+from modules.message_parser import parse_period
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.mark.parametrize(
+    ("text", "start_date"),
+    [
+        ("7d", date(2026, 10, 13)),
+        ("последние 7 дней", date(2026, 10, 13)),
+        ("день", TODAY),
+        ("2w", date(2026, 10, 6)),
+        ("3m", date(2026, 7, 20)),
+        ("последние 3 месяца", date(2026, 7, 20)),
+        ("1y", date(2025, 10, 20)),
+    ],
+)
+def test_relative_periods_end_today(text, start_date):
+    assert parse_period(text, TODAY)[:2] == (start_date, TODAY)
+
+
+def test_explicit_periods():
+    assert parse_period("2026-09", TODAY)[:2] == (date(2026, 9, 1), date(2026, 9, 30))
+    assert parse_period("2025", TODAY)[:2] == (date(2025, 1, 1), date(2025, 12, 31))
+    assert parse_period("2026-09-01..2026-10", TODAY) == (date(2026, 9, 1), date(2026, 10, 31), "(2026-09-01 - 2026-10-31)")
+    assert parse_period("2026-09-05", TODAY) == (date(2026, 9, 5), date(2026, 9, 5), "2026-09-05")
+
+
+@pytest.mark.parametrize("text", ["0d", "0m", "-3d", "сто дней", "2026-10..2026-09"])
+def test_invalid_periods(text):
+    with pytest.raises(ValueError):
+        parse_period(text, TODAY)
+
+
+@pytest.mark.parametrize("text", ["99999999999d", "99999999999w", "99999999999m", "99999999999y", "101y", "0001..2026"])
+def test_too_long_periods(text):
+    # Не OverflowError из timedelta или calendar, а понятная пользователю ошибка
+    with pytest.raises(ValueError, match="❌"):
+        parse_period(text, TODAY)
+
+
+def test_longest_period_allowed():
+    assert parse_period("100y", TODAY)[:2] == (date(1926, 10, 20), TODAY)
+
+
+def test_today_uses_timezone(monkeypatch):
+    # UTC+14: дата там отличается от даты сервера в UTC почти половину суток
+    monkeypatch.setattr(clock, "_zone", ZoneInfo("Pacific/Kiritimati"))
+    assert clock.today() == datetime.now(ZoneInfo("Pacific/Kiritimati")).date()
+
+    monkeypatch.setattr(clock, "today", lambda: TODAY)
+    assert parse_period("7d")[:2] == (date(2026, 10, 13), TODAY)
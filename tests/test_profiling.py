@@ -0,0 +1,83 @@
+import asyncio
+import pstats
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from telegram.ext import Application, TypeHandler
+
+from main import register_handlers
+from modules.profiling import ProfilingSession
+
+
+def test_profiling_wraps_only_update_handlers():
+    application = Application.builder().token("123:test").build()
+    register_handlers(application)
+    hooks = [handler for group, handlers in application.handlers.items() if group != 0 for handler in handlers]
+    hook_callbacks = [handler.callback for handler in hooks]
+
+    session = ProfilingSession(application, chat_id=1, max_updates=100)
+    session.install()
+    assert [handler.callback for handler in hooks] == hook_callbacks
+    assert all(isinstance(handler, TypeHandler) for handler in hooks)
+    assert len(session._originals) == len(application.handlers[0]) - 1  # Кроме самой /profile
+
+    # Одно обновление проходит хуки всех групп, но считается один раз
+    async def handle(update, context):
+        pass
+
+    wrapped = session._wrap(handle)
+    for update_id in range(3):
+        asyncio.run(wrapped(SimpleNamespace(update_id=update_id), None))
+    assert session.updates == 3
+    assert list(session.profiles) == ["handle"]
+
+    session.uninstall()
+    assert not any(callback.__name__ == "profiled" for callback in (h.callback for h in application.handlers[0]))
+
+
+def busy_elsewhere(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_excludes_other_coroutines():
+    application = Application.builder().token("123:test").build()
+    session = ProfilingSession(application, chat_id=1, max_updates=1)
+    stopped = []
+
+    async def handle(update, context):
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def other():
+        await asyncio.sleep(0.01)
+        busy_elsewhere(0.05)  # Пока handle ждёт, цикл событий занят другой корутиной
+
+    async def main():
+        application.create_task = lambda coroutine: stopped.append(coroutine.close())
+        background = asyncio.create_task(other())
+        result = await session._wrap(handle)(SimpleNamespace(update_id=1), None)
+        await background
+        return result
+
+    assert asyncio.run(main()) == "ok"
+    functions = {function for _, _, function in pstats.Stats(session.profiles["handle"]).stats}
+    assert "handle" in functions and "busy_elsewhere" not in functions
+    # Последнее обновление запускает остановку через application.create_task
+    assert session.updates == 1 and len(stopped) == 1
+
+
+def test_wrapped_handler_errors_propagate():
+    application = Application.builder().token("123:test").build()
+    session = ProfilingSession(application, chat_id=1, max_updates=100)
+
+    async def handle(update, context):
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(session._wrap(handle)(SimpleNamespace(update_id=1), None))
+    assert session.updates == 1
@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telegram.ext import ApplicationHandlerStop
+
+from modules import rate_limit
+from modules.rate_limit import TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_refill():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=2, burst=3, max_chats=10, clock=clock)
+    assert [limiter.acquire(1)[0] for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 0.25  # Полтокена: ещё рано
+    allowed, _, retry_after = limiter.acquire(1)
+    assert not allowed and retry_after == pytest.approx(0.25)
+
+    clock.now += 0.25
+    assert limiter.acquire(1)[0]
+    # Корзина не наполняется выше burst, сколько бы ни прошло времени
+    clock.now += 100
+    assert [limiter.acquire(1)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_notice_once_per_throttle():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_chats=10, clock=clock)
+    limiter.acquire(1)
+    assert limiter.acquire(1)[:2] == (False, True)
+    assert limiter.acquire(1)[:2] == (False, False)
+
+    # После разрешённого сообщения следующее превышение снова предупреждается
+    clock.now += 1
+    assert limiter.acquire(1)[0]
+    assert limiter.acquire(1)[:2] == (False, True)
+
+
+def test_idle_buckets_and_max_chats_evicted():
+    clock = Clock()
+    limiter = TokenBucketLimiter(rate=1, burst=5, max_chats=3, clock=clock)
+    for chat_id in (1, 2, 3):
+        limiter.acquire(chat_id)
+    assert len(limiter) == 3
+
+    limiter.acquire(4)  # Сверх max_chats удаляется самая давняя корзина
+    assert len(limiter) == 3 and 1 not in limiter._buckets
+
+    clock.now += 5  # Время полного наполнения: корзины 2-4 уже как новые
+    limiter.acquire(5)
+    assert list(limiter._buckets) == [5]
+
+
+class FakeQuery:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+
+def test_callback_queries_use_chat_bucket(monkeypatch):
+    monkeypatch.setattr(rate_limit, "limiter", TokenBucketLimiter(rate=1, burst=2, max_chats=10, clock=Clock()))
+    query = FakeQuery()
+    update = SimpleNamespace(
+        callback_query=query, message=None, effective_chat=SimpleNamespace(id=1, type="private"), effective_user=None
+    )
+
+    async def tap():
+        try:
+            await rate_limit.rate_limit_messages(update, None)
+            return True
+        except ApplicationHandlerStop:
+            return False
+
+    assert [asyncio.run(tap()) for _ in range(4)] == [True, True, False, False]
+    # Первое лишнее нажатие - предупреждение, следующее только снимает загрузку с кнопки
+    assert query.answers[0][1] is True and query.answers[1] == (None, False)
+
+
+
+class FakeMessage:
+    text = "кофе 100"
+
+    async def reply_text(self, text):
+        pass
+
+
+@pytest.mark.parametrize(("per_member", "expected"), [(False, [True, True, False]), (True, [True, True, True])])
+def test_group_limit_is_per_chat_unless_per_member(monkeypatch, per_member, expected):
+    monkeypatch.setattr(rate_limit, "limiter", TokenBucketLimiter(rate=1, burst=2, max_chats=10, clock=Clock()))
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PER_MEMBER", per_member)
+
+    async def send(user_id):
+        update = SimpleNamespace(
+            callback_query=None,
+            message=FakeMessage(),
+            effective_chat=SimpleNamespace(id=-100, type="group"),
+            effective_user=SimpleNamespace(id=user_id),
+        )
+        try:
+            await rate_limit.rate_limit_messages(update, None)
+            return True
+        except ApplicationHandlerStop:
+            return False
+
+    # Третье сообщение - от другого участника: по умолчанию корзина чата уже пуста
+    assert [asyncio.run(send(user_id)) for user_id in (1, 1, 2)] == expected
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import READ_AFTER_WRITE_SECONDS
+from modules import database as db
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    """Вторая база как реплика: маршрутизация та же, что у PostgreSQL с DATABASE_REPLICA_URL"""
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(db, "IS_SQLITE", False)
+    monkeypatch.setattr(db, "replica_engine", replica_engine)
+    monkeypatch.setattr(db, "ReplicaSession", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(db, "_recent_writes", db.OrderedDict())
+    yield replica_engine
+    replica_engine.dispose()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db.time, "monotonic", lambda: now[0])
+    return now
+
+
+def bind_of(session):
+    try:
+        return session.get_bind()
+    finally:
+        session.close()
+
+
+def test_reads_follow_own_writes(replica, clock, chat_id, make_chat_id):
+    other_chat_id = make_chat_id()
+    assert bind_of(db.read_session(chat_id)) is replica
+    assert bind_of(db.read_session()) is replica
+
+    db.mark_write(chat_id)
+    clock[0] += READ_AFTER_WRITE_SECONDS / 2
+    assert bind_of(db.read_session(chat_id)) is db.engine
+    # Чтения других чатов и без чата по-прежнему идут в реплику
+    assert bind_of(db.read_session(other_chat_id)) is replica
+    assert bind_of(db.read_session()) is replica
+
+    clock[0] += READ_AFTER_WRITE_SECONDS
+    assert bind_of(db.read_session(chat_id)) is replica
+
+
+def test_stale_writes_are_pruned(replica, clock, make_chat_id):
+    old_chat_ids = [make_chat_id() for _ in range(3)]
+    for old_chat_id in old_chat_ids:
+        db.mark_write(old_chat_id)
+
+    clock[0] += READ_AFTER_WRITE_SECONDS + 1
+    new_chat_id = make_chat_id()
+    db.mark_write(new_chat_id)
+    assert list(db._recent_writes) == [new_chat_id]
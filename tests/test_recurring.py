@@ -0,0 +1,59 @@
+import asyncio
+from datetime import date, timedelta
+
+from modules import clock
+from modules import database as db
+from modules import recurring
+from modules.money import Money
+
+
+def test_materialize_catches_up_missed_dates(chat_id, today):
+    db.set_budget(chat_id, "аренда", Money(100000), today.replace(day=1))
+    db.add_recurring_transaction(chat_id, "аренда", Money(1000), False, "week", today - timedelta(days=15))
+    db.add_recurring_transaction(chat_id, "зп", Money(5000), True, "month", today - timedelta(days=40))
+
+    db.materialize_recurring_transactions(today)
+    assert db.count_transactions(chat_id) == 3 + 2
+    # Повторный запуск не создаёт дублей
+    db.materialize_recurring_transactions(today)
+    assert db.count_transactions(chat_id) == 5
+
+    assert db.get_user_balance(chat_id) == Money(10000 - 3000)
+    next_dates = {row.category: row.next_date for row in db.get_recurring_transactions(chat_id)}
+    assert next_dates["аренда"] == today + timedelta(days=6)
+    assert next_dates["зп"] > today
+
+
+def test_delete_recurring_keeps_created_transactions(chat_id, today):
+    recurring_id = db.add_recurring_transaction(chat_id, "кофе", Money(200), False, "day", today)
+    db.materialize_recurring_transactions(today)
+
+    assert db.delete_recurring_transaction(chat_id, recurring_id) == 1
+    assert db.get_recurring_transactions(chat_id) == []
+    assert db.count_transactions(chat_id) == 1
+
+
+def test_monthly_dates_do_not_drift_after_short_month(chat_id):
+    db.add_recurring_transaction(chat_id, "аренда", Money(1000), False, "month", date(2026, 1, 31))
+    # Запуск каждый день: повтор после 28 февраля всё равно приходится на последний день месяца, а не на 28-е
+    day = date(2026, 1, 31)
+    while day <= date(2026, 6, 30):
+        db.materialize_recurring_transactions(day)
+        day += timedelta(days=1)
+
+    dates = sorted(row.date for row in db.get_transactions(chat_id))
+    assert dates == [
+        date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31), date(2026, 6, 30)
+    ]
+    assert db.get_recurring_transactions(chat_id)[0].next_date == date(2026, 7, 31)
+
+
+def test_job_uses_timezone_today(chat_id, today, monkeypatch):
+    db.add_recurring_transaction(chat_id, "кофе", Money(200), False, "day", today + timedelta(days=1))
+    asyncio.run(recurring.create_recurring_transactions(None))
+    assert db.count_transactions(chat_id) == 0
+
+    # В TIMEZONE уже наступило завтра, хотя на сервере ещё сегодня
+    monkeypatch.setattr(clock, "today", lambda: today + timedelta(days=1))
+    asyncio.run(recurring.create_recurring_transactions(None))
+    assert db.count_transactions(chat_id) == 1
@@ -0,0 +1,216 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from modules import database as db
+from modules.message_parser import shift_months
+from modules.money import Money
+
+
+def test_add_transaction_updates_balance_and_budget(chat_id, today):
+    month = today.replace(day=1)
+    db.set_budget(chat_id, "еда", Money(10000), month)
+
+    status = db.add_transaction(chat_id, today, "еда", Money(3000), False)
+    assert status.spent == Money(3000)
+    assert status.budget_limit == Money(10000)
+    # Без бюджета счётчик не создаётся
+    assert db.add_transaction(chat_id, today, "кино", Money(500), False) is None
+    db.add_transaction(chat_id, today, "зарплата", Money(100000), True)
+
+    assert db.get_user_balance(chat_id) == Money(96500)
+    assert db.count_transactions(chat_id) == 3
+    assert [(row.category, row.spent) for row in db.get_budgets(chat_id, month)] == [("еда", Money(3000))]
+
+
+
+def test_member_expense_updates_budget(chat_id, today):
+    month = today.replace(day=1)
+    db.set_budget(chat_id, "еда", Money(10000), month)
+
+    status = db.add_transaction(chat_id, today, "еда", Money(2500), False, user_id=1)
+    assert (status.spent, status.budget_limit) == (Money(2500), Money(10000))
+    assert db.add_transaction(chat_id, today, "кино", Money(500), False, user_id=2) is None
+    assert db.get_user_balance(chat_id) == Money(-3000)
+
+
+def test_set_budget_counts_only_its_month(chat_id, today):
+    month = today.replace(day=1)
+    db.add_transaction(chat_id, month, "еда", Money(300), False)
+    db.add_transaction(chat_id, shift_months(month, 1), "еда", Money(5000), False)
+    db.add_transaction(chat_id, month - timedelta(days=1), "еда", Money(700), False)
+
+    assert db.set_budget(chat_id, "еда", Money(1000), month) == Money(300)
+    assert db.get_budgets(chat_id, month)[0].spent == Money(300)
+
+
+def test_set_budget_waits_for_concurrent_expense(chat_id, today):
+    month = today.replace(day=1)
+    # Бюджет задан в прошлом месяце, счётчика за этот месяц ещё нет - его создаст расход
+    db.add_transaction(chat_id, today, "еда", Money(1000), False)
+    db.set_budget(chat_id, "еда", Money(10000), shift_months(month, -1))
+
+    # Расход записан, но не закоммичен, пока set_budget пересчитывает счётчик
+    paused, release = threading.Event(), threading.Event()
+
+    def hold_commit(session):
+        if threading.current_thread().name == "expense":
+            paused.set()
+            release.wait(5)
+
+    event.listen(db.Session, "before_commit", hold_commit)
+    try:
+        expense = threading.Thread(
+            target=db.add_transaction, args=(chat_id, today, "еда", Money(500), False), name="expense"
+        )
+        expense.start()
+        assert paused.wait(5)
+        budget = threading.Thread(target=db.set_budget, args=(chat_id, "еда", Money(20000), month))
+        budget.start()
+        time.sleep(0.2)
+        release.set()
+        expense.join()
+        budget.join()
+    finally:
+        release.set()
+        event.remove(db.Session, "before_commit", hold_commit)
+
+    # Расход учтён ровно один раз: не потерян и не посчитан дважды
+    assert db.get_budgets(chat_id, month)[0].spent == Money(1500)
+
+def test_user_snapshot(chat_id, today):
+    empty = db.get_user_snapshot(chat_id)
+    assert empty.balance == Money(0)
+    assert empty.currencies == []
+    assert empty.transactions_count == 0
+    assert empty.last_transaction is None
+
+    db.add_transaction(chat_id, today - timedelta(days=1), "кафе", Money(700), False)
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.create_currency_balance(chat_id, "USD")
+    db.update_user_currency(chat_id, "USD", Money(1234))
+
+    snapshot = db.get_user_snapshot(chat_id)
+    assert snapshot.balance == Money(-1200)
+    assert [(row.currency, row.amount) for row in snapshot.currencies] == [("USD", Money(1234))]
+    assert snapshot.transactions_count == 2
+    assert snapshot.last_transaction.category == "кино"
+    assert snapshot.last_transaction.date == today
+
+
+def test_transactions_page_keyset(chat_id, today):
+    for offset in range(5):
+        db.add_transaction(chat_id, today - timedelta(days=offset), f"день {offset}", Money(100), False)
+
+    rows, has_older, has_newer = db.get_transactions_page(chat_id, limit=2)
+    assert [row.category for row in rows] == ["день 0", "день 1"]
+    assert has_older and not has_newer
+
+    cursor = (rows[-1].date, rows[-1].id)
+    rows, has_older, has_newer = db.get_transactions_page(chat_id, cursor=cursor, limit=2)
+    assert [row.category for row in rows] == ["день 2", "день 3"]
+    assert has_older and has_newer
+
+    cursor = (rows[0].date, rows[0].id)
+    rows, has_older, has_newer = db.get_transactions_page(chat_id, cursor=cursor, direction="newer", limit=2)
+    assert [row.category for row in rows] == ["день 0", "день 1"]
+    assert has_older and not has_newer
+
+
+def test_search_transactions(chat_id, today):
+    db.add_transaction(chat_id, today, "еда", Money(3000), False, note="Продукты Пятёрочка")
+    db.add_transaction(chat_id, today, "такси", Money(800), False, note="аэропорт")
+
+    assert [row.category for row in db.search_transactions(chat_id, ["пятёр"])[0]] == ["еда"]
+    assert [row.category for row in db.search_transactions(chat_id, ["ПРОДУКТЫ"])[0]] == ["еда"]
+    assert db.search_transactions(chat_id, ["еда"], min_amount=Money(5000))[0] == []
+    assert len(db.search_transactions(chat_id, [], max_amount=Money(1000))[0]) == 1
+
+
+def test_update_and_delete_transaction(chat_id, today):
+    month = today.replace(day=1)
+    db.set_budget(chat_id, "еда", Money(10000), month)
+    db.add_transaction(chat_id, today, "еда", Money(3000), False)
+    transaction = db.get_transactions(chat_id)[0]
+
+    old = db.update_transaction_amount(chat_id, transaction.id, Money(4000))
+    assert old.old_amount == Money(3000)
+    assert db.get_transaction(chat_id, transaction.id).amount == Money(4000)
+    assert db.get_user_balance(chat_id) == Money(-4000)
+    assert db.get_budgets(chat_id, month)[0].spent == Money(4000)
+
+    deleted = db.delete_transaction(chat_id, transaction.id)
+    assert (deleted.category, deleted.amount, deleted.type) == ("еда", Money(4000), "expense")
+    assert db.get_user_balance(chat_id) == Money(0)
+    assert db.get_budgets(chat_id, month)[0].spent == Money(0)
+    assert db.delete_transaction(chat_id, transaction.id) is None
+    assert db.update_transaction_amount(chat_id, transaction.id, Money(1)) is None
+
+
+def test_group_chat_member_shards(chat_id, today):
+    db.save_chat_member(chat_id, 1, "Аня")
+    db.save_chat_member(chat_id, 1, "Аня К")
+    db.add_transaction(chat_id, today, "еда", Money(1000), False, user_id=1)
+    db.add_transaction(chat_id, today, "еда", Money(700), False, user_id=2)
+    db.add_transaction(chat_id, today, "бонус", Money(5000), True)
+    assert db.get_user_balance(chat_id) == Money(3300)
+
+    statistics = db.get_member_statistics(chat_id, today, today)
+    assert [(row.user_id, row.name, row.expenses) for row in statistics][:2] == [
+        (1, "Аня К", Money(1000)), (2, None, Money(700))
+    ]
+
+    transaction = next(row for row in db.get_transactions(chat_id) if row.amount == Money(700))
+    db.update_transaction_amount(chat_id, transaction.id, Money(200))
+    assert db.get_user_balance(chat_id) == Money(3800)
+    db.delete_transaction(chat_id, transaction.id)
+    assert db.get_user_balance(chat_id) == Money(4000)
+
+    db.reset_user_balance(chat_id, Money(100))
+    assert db.get_user_balance(chat_id) == Money(100)
+
+
+def test_period_comparison_and_chart_data(chat_id, today):
+    start = today - timedelta(days=6)
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.add_transaction(chat_id, start - timedelta(days=1), "кино", Money(300), False)
+
+    rows = {(row.type, row.category): (row.amount, row.prev_amount) for row in db.get_period_comparison(
+        chat_id, start, today, start - timedelta(days=7)
+    )}
+    assert rows == {("expense", "кино"): (Money(500), Money(300))}
+    assert [(row.date, row.category, row.amount) for row in db.get_chart_data(chat_id, start, today)] == [
+        (today, "кино", Money(500))
+    ]
+
+
+def test_expense_columns(chat_id, today):
+    db.add_transaction(chat_id, today, "кино", Money(500), False)
+    db.add_transaction(chat_id, today, "кино", Money(100), False)
+    db.add_transaction(chat_id, today - timedelta(days=1), "еда", Money(300), False)
+    db.add_transaction(chat_id, today, "зарплата", Money(100000), True)
+
+    days, codes, amounts, names = db.get_expense_columns(chat_id, today - timedelta(days=30), today)
+    epoch_day = (today - date(1970, 1, 1)).days
+    assert list(names) == ["еда", "кино"]
+    assert sorted(zip(days, codes, amounts)) == [(epoch_day - 1, 0, 300), (epoch_day, 1, 600)]
+
+    assert db.get_expense_columns(chat_id, today - timedelta(days=60), today - timedelta(days=31)) == ([], [], [], [])
+
+
+def test_currencies_and_budgets(chat_id, today):
+    month = today.replace(day=1)
+    assert db.create_currency_balance(chat_id, "CNY") == Money(0)
+    db.update_user_currency(chat_id, "CNY", Money(500))
+    assert db.create_currency_balance(chat_id, "CNY") == Money(500)
+    assert [(row.currency, row.amount) for row in db.get_user_currencies(chat_id)] == [("CNY", Money(500))]
+    assert db.delete_user_currency(chat_id, "CNY") == 1
+    assert db.get_user_currencies(chat_id) == []
+
+    db.add_transaction(chat_id, today, "еда", Money(300), False)
+    # Бюджет, заданный после операций, сразу учитывает расходы месяца
+    assert db.set_budget(chat_id, "еда", Money(1000), month) == Money(300)
+    assert db.delete_budget(chat_id, "еда") == 1
+    assert db.get_budgets(chat_id, month) == []
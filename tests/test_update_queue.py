@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+from config import QUEUE_SHARDS
+from modules import database as db
+from modules.update_queue import get_shard, run_worker
+
+
+class WorkerCrash(BaseException):
+    """Падение процесса воркера посреди пачки"""
+
+
+class FakeApplication:
+    bot = None
+
+    def __init__(self, crash_on):
+        self.crash_on = crash_on
+        self.processed = []
+
+    async def initialize(self):
+        pass
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def process_update(self, update):
+        if update.update_id == self.crash_on:
+            raise WorkerCrash()
+        self.processed.append(update.update_id)
+
+
+def test_worker_acknowledges_each_update(chat_id):
+    shard = get_shard(chat_id)
+    for update_id in (1, 2, 3):
+        db.enqueue_update(shard, chat_id, json.dumps({"update_id": update_id}))
+
+    # Один шард на воркер: воркер видит только обновления этого теста
+    application = FakeApplication(crash_on=2)
+    with pytest.raises(WorkerCrash):
+        asyncio.run(run_worker(application, shard, QUEUE_SHARDS))
+    assert application.processed == [1]
+
+    # Обработанное обновление уже удалено - после перезапуска повторятся только необработанные
+    session = db.Session()
+    rows = session.query(db.QueuedUpdate).filter(db.QueuedUpdate.chat_id == chat_id).order_by(db.QueuedUpdate.id).all()
+    session.close()
+    assert [json.loads(row.payload)["update_id"] for row in rows] == [2, 3]
+    db.delete_updates([row.id for row in rows])
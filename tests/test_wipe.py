@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.exc import OperationalError
+
+from modules import database as db
+from modules import wipe
+from modules.money import Money
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text):
+        self.messages.append((chat_id, text))
+
+
+def flaky_delete(failures):
+    """delete_wipe_batch, который первые failures вызовов падает, как при обрыве соединения"""
+    calls = {"count": 0}
+
+    def delete(chat_id, batch_size):
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise OperationalError("DELETE", {}, Exception("connection reset"))
+        return db.delete_wipe_batch(chat_id, batch_size)
+
+    return delete
+
+
+def start_wipe(chat_id, today):
+    for _ in range(3):
+        db.add_transaction(chat_id, today, "кино", Money(100), False)
+    db.start_user_data_wipe(chat_id)
+
+
+def test_wipe_retries_transient_errors(chat_id, today, monkeypatch):
+    start_wipe(chat_id, today)
+    monkeypatch.setattr(wipe, "WIPE_RETRY_DELAY", 0)
+    monkeypatch.setattr(wipe, "delete_wipe_batch", flaky_delete(2))
+
+    bot = FakeBot()
+    asyncio.run(wipe.run_wipe_job(bot, chat_id, None))
+    assert db.count_transactions(chat_id) == 0
+    assert bot.messages == [(chat_id, "✅ Все данные удалены (операций: 3). Бот готов к работе с чистого листа!")]
+
+
+def test_stuck_wipe_is_resumed(chat_id, today, monkeypatch):
+    start_wipe(chat_id, today)
+    monkeypatch.setattr(wipe, "WIPE_RETRY_DELAY", 0)
+    monkeypatch.setattr(wipe, "delete_wipe_batch", flaky_delete(wipe.WIPE_RETRIES + 1))
+
+    bot = FakeBot()
+    asyncio.run(wipe.run_wipe_job(bot, chat_id, None))
+    # Повторы кончились - задание осталось в БД
+    assert any(job.chat_id == chat_id for job in db.get_wipe_jobs())
+
+    async def resume():
+        tasks = []
+        application = SimpleNamespace(create_task=lambda coroutine: tasks.append(asyncio.ensure_future(coroutine)))
+        await wipe.resume_wipe_jobs(SimpleNamespace(application=application, bot=bot))
+        await asyncio.gather(*tasks)
+
+    monkeypatch.setattr(wipe, "delete_wipe_batch", db.delete_wipe_batch)
+    asyncio.run(resume())
+    assert db.count_transactions(chat_id) == 0
+    assert (chat_id, "✅ Все данные удалены (операций: 3). Бот готов к работе с чистого листа!") in bot.messages